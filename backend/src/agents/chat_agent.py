@@ -1,22 +1,45 @@
-from typing import List, TypedDict
-from langchain.tools import tool
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, NotRequired, TypedDict
+from langchain_core.tools import StructuredTool
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.agents import create_agent
-from src.api.deps import get_llm, get_vector_store
+from langchain_core.documents import Document
+from src.api.deps import get_embeddings, get_llm, get_pinecone_index
 from langchain.tools import ToolRuntime
 from langchain.agents.middleware import ClearToolUsesEdit, ContextEditingMiddleware, ModelRetryMiddleware, dynamic_prompt, ModelRequest, AgentState
 from langsmith import Client
 from langchain_classic.prompts import BaseChatPromptTemplate
 from collections import defaultdict
+from src.agents.query_cache import QueryCache, query_cache, semantic_query_cache
+from src.agents.rank import mmr_select
+from src.core.config import settings
 
 langsmith_client = Client()
-ask_youtube_agent_system_prompt : BaseChatPromptTemplate = langsmith_client.pull_prompt(
-    "ask_youtube_agent_system_prompt",
-) 
+
+@lru_cache(maxsize=None)
+def pull_system_prompt(revision: str = "") -> BaseChatPromptTemplate:
+    """Pull the agent system prompt from LangSmith, once per revision."""
+    identifier = "ask_youtube_agent_system_prompt"
+    if revision:
+        identifier = f"{identifier}:{revision}"
+    return langsmith_client.pull_prompt(identifier)
+
+ask_youtube_agent_system_prompt = pull_system_prompt(settings.SYSTEM_PROMPT_REVISION)
+
+# The base prompt takes no variables, so render it once instead of per model call
+BASE_PROMPT_STR = ask_youtube_agent_system_prompt.format()
+
+RETRIEVAL_K = 3
+
+_WHITESPACE_TO_SPACE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
 
 class YoutubeVideo(TypedDict):
     video_id: str
     title: str
     summary: str
+    # Indexed by each chunk's parent_id; chunks no longer carry the summary in their metadata
+    chapter_summaries: NotRequired[List[str]]
 
 class YTAgentState(AgentState):
     videos: List[YoutubeVideo]
@@ -27,65 +50,268 @@ def inject_video_summaries(request: ModelRequest) -> str:
     Dynamically generates the system prompt based on the active videos
     in the current runtime context.
     """
-    
-    base_prompt = ask_youtube_agent_system_prompt.format()
-
     active_videos = request.state.get('videos', [])
 
-    video_context_str = "\n\n# CURRENT CONTEXT\n## Active Video Summaries:\n"
-    
-    for id, vid in enumerate(active_videos):
-        # Get summary or fallback text
-        video_context_str += f"- **Video**\n Video Title: {vid['title']}\n Video Summary: {vid['summary']}\n"
-    
-    return base_prompt + video_context_str
+    parts = ["\n\n# CURRENT CONTEXT\n## Active Video Summaries:"]
+    parts.extend(
+        f"- **Video** - Video Number: {i + 1}\n Video Title: {vid['title']}\n Video Summary: {vid['summary']}"
+        for i, vid in enumerate(active_videos)
+    )
 
+    return BASE_PROMPT_STR + "\n".join(parts)
 
 
-@tool(response_format="content_and_artifact")
-def retrieve_context(query: str, runtime: ToolRuntime[YTAgentState]):
-    """
-    Search the video transcripts for specific details.
-    """
-    videos = runtime.state.get('videos', [])
 
-    video_ids = [vid['video_id'] for vid in videos]
+def _chapter_summaries_by_video(videos: List[YoutubeVideo]) -> Dict[str, List[str]]:
+    return {vid['video_id']: vid.get('chapter_summaries', []) for vid in videos}
 
-    retrieved_docs = get_vector_store().similarity_search(
-        query,
-        k=3,
-        filter={
-            "video_id": {"$in": video_ids}
-        } # type: ignore
-    )
 
+def _chapter_context(metadata: dict, chapter_summaries: Dict[str, List[str]]) -> str:
+    # Chunks ingested before chapter summaries moved to the database still carry their own
+    chapter = metadata.get('chapter_summary')
+    if chapter is not None:
+        return chapter
+
+    summaries = chapter_summaries.get(metadata.get('video_id'), [])
+    parent_id = metadata.get('parent_id')
+    if parent_id is not None and int(parent_id) < len(summaries):
+        return summaries[int(parent_id)]
+    return 'No chapter context'
+
+
+def _serialize_docs(retrieved_docs, chapter_summaries: Dict[str, List[str]]) -> str:
+    """Group retrieved chunks by video and chapter into the tool's text output."""
     grouped_docs = defaultdict(lambda: defaultdict(list))
     for doc in retrieved_docs:
         vid = doc.metadata.get('video_id', 'Unknown Video')
-        chapter = doc.metadata.get('chapter_summary', 'No chapter context')
+        chapter = _chapter_context(doc.metadata, chapter_summaries)
 
-        clean_content = doc.page_content.replace('\n', ' ').strip()
+        clean_content = doc.page_content.translate(_WHITESPACE_TO_SPACE).strip()
         grouped_docs[vid][chapter].append(clean_content)
 
     serialized_parts = []
+    append = serialized_parts.append
     for vid, chapters in grouped_docs.items():
-        serialized_parts.append(f"### Video ID: {vid}")
+        append(f"### Video ID: {vid}")
         for chapter_summary, chunks in chapters.items():
-            serialized_parts.append(f"**Chapter Context:** {chapter_summary} \n Here are some transcripts with timestamps:")
-            for chunk in chunks:
-                serialized_parts.append(f"- {chunk}")
-        serialized_parts.append("---")
+            append(f"**Chapter Context:** {chapter_summary} \n Here are some transcripts with timestamps:")
+            serialized_parts.extend(f"- {chunk}" for chunk in chunks)
+        append("---")
+
+    return "\n".join(serialized_parts)
+
+
+def _query_embedding_kwargs(embeddings) -> dict:
+    # Gemini embeds documents and queries differently, so batched queries must ask for query vectors
+    if isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+        return {"task_type": "RETRIEVAL_QUERY"}
+    return {}
+
 
-    serialized = "\n".join(serialized_parts)
-    
+def _video_filter(video_ids: List[str]) -> dict:
+    # Threads usually have a single video, where plain equality is cheaper than $in
+    if len(video_ids) == 1:
+        return {"video_id": video_ids[0]}
+    return {"video_id": {"$in": video_ids}}
+
+
+def _cache_result(
+    cache_key: bytes,
+    query_embedding: List[float],
+    video_ids: List[str],
+    chapter_summaries: Dict[str, List[str]],
+    retrieved_docs,
+):
+    result = (_serialize_docs(retrieved_docs, chapter_summaries), retrieved_docs)
+    query_cache.put(cache_key, video_ids, result)
+    semantic_query_cache.put(video_ids, query_embedding, result)
+    return result
+
+
+def _join_batch_results(queries: List[str], results):
+    serialized = "\n\n".join(
+        f"## Query: {query}\n{serialized_part}"
+        for query, (serialized_part, _) in zip(queries, results)
+    )
+    retrieved_docs = [doc for _, docs in results for doc in docs]
     return serialized, retrieved_docs
 
 
+def _fetch_candidates(query_embedding: List[float], video_ids: List[str]):
+    """Over-fetch the nearest chunks together with their stored vectors for MMR."""
+    results = get_pinecone_index().query(
+        vector=query_embedding,
+        top_k=settings.RETRIEVAL_FETCH_K,
+        include_values=True,
+        include_metadata=True,
+        filter=_video_filter(video_ids),
+    )
+    docs, vectors = [], []
+    for match in results["matches"]:
+        metadata = dict(match["metadata"])
+        docs.append(Document(page_content=metadata.pop("text"), metadata=metadata))
+        vectors.append(match["values"])
+    return docs, vectors
+
+
+def _rerank(query_embedding: List[float], docs, vectors):
+    picked = mmr_select(query_embedding, vectors, k=RETRIEVAL_K, lambda_mult=settings.RETRIEVAL_MMR_LAMBDA)
+    return [docs[i] for i in picked]
+
+
+def _search_by_embedding(
+    cache_key: bytes,
+    query_embedding: List[float],
+    video_ids: List[str],
+    chapter_summaries: Dict[str, List[str]],
+):
+    """Resolve an embedded query through the semantic cache, then the vector store."""
+    cached = semantic_query_cache.get(video_ids, query_embedding)
+    if cached is not None:
+        query_cache.put(cache_key, video_ids, cached)
+        return cached
+
+    docs, vectors = _fetch_candidates(query_embedding, video_ids)
+    retrieved_docs = _rerank(query_embedding, docs, vectors)
+    return _cache_result(cache_key, query_embedding, video_ids, chapter_summaries, retrieved_docs)
+
+
+async def _asearch_by_embedding(
+    cache_key: bytes,
+    query_embedding: List[float],
+    video_ids: List[str],
+    chapter_summaries: Dict[str, List[str]],
+):
+    """Async twin of ``_search_by_embedding``."""
+    cached = semantic_query_cache.get(video_ids, query_embedding)
+    if cached is not None:
+        query_cache.put(cache_key, video_ids, cached)
+        return cached
+
+    # Query each video concurrently and let MMR pick the top-k from the pooled candidates
+    per_video = await asyncio.gather(*(
+        asyncio.to_thread(_fetch_candidates, query_embedding, [video_id])
+        for video_id in video_ids
+    ))
+    docs = [doc for video_docs, _ in per_video for doc in video_docs]
+    vectors = [vector for _, video_vectors in per_video for vector in video_vectors]
+    retrieved_docs = _rerank(query_embedding, docs, vectors)
+    return _cache_result(cache_key, query_embedding, video_ids, chapter_summaries, retrieved_docs)
+
+
+def _retrieve_context(query: str, runtime: ToolRuntime[YTAgentState]):
+    """
+    Search the video transcripts for specific details.
+    """
+    videos = runtime.state.get('videos', [])
+
+    video_ids = [vid['video_id'] for vid in videos]
+    chapter_summaries = _chapter_summaries_by_video(videos)
+
+    cache_key = QueryCache.make_key(query, video_ids, RETRIEVAL_K)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query_embedding = get_embeddings().embed_query(query)
+    return _search_by_embedding(cache_key, query_embedding, video_ids, chapter_summaries)
+
+
+async def _aretrieve_context(query: str, runtime: ToolRuntime[YTAgentState]):
+    """
+    Search the video transcripts for specific details.
+    """
+    videos = runtime.state.get('videos', [])
+
+    video_ids = [vid['video_id'] for vid in videos]
+    chapter_summaries = _chapter_summaries_by_video(videos)
+
+    cache_key = QueryCache.make_key(query, video_ids, RETRIEVAL_K)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query_embedding = await get_embeddings().aembed_query(query)
+    return await _asearch_by_embedding(cache_key, query_embedding, video_ids, chapter_summaries)
+
+
+def _retrieve_context_batch(queries: List[str], runtime: ToolRuntime[YTAgentState]):
+    """
+    Search the video transcripts for several specific details at once.
+    Prefer this over calling retrieve_context repeatedly when you need more than one lookup.
+    """
+    videos = runtime.state.get('videos', [])
+
+    video_ids = [vid['video_id'] for vid in videos]
+    chapter_summaries = _chapter_summaries_by_video(videos)
+
+    cache_keys = [QueryCache.make_key(query, video_ids, RETRIEVAL_K) for query in queries]
+    results = [query_cache.get(cache_key) for cache_key in cache_keys]
+
+    # Embed every cache miss in a single API call
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        embeddings = get_embeddings()
+        query_embeddings = embeddings.embed_documents(
+            [queries[i] for i in misses],
+            **_query_embedding_kwargs(embeddings),
+        )
+        for i, query_embedding in zip(misses, query_embeddings):
+            results[i] = _search_by_embedding(cache_keys[i], query_embedding, video_ids, chapter_summaries)
+
+    return _join_batch_results(queries, results)
+
+
+async def _aretrieve_context_batch(queries: List[str], runtime: ToolRuntime[YTAgentState]):
+    """
+    Search the video transcripts for several specific details at once.
+    Prefer this over calling retrieve_context repeatedly when you need more than one lookup.
+    """
+    videos = runtime.state.get('videos', [])
+
+    video_ids = [vid['video_id'] for vid in videos]
+    chapter_summaries = _chapter_summaries_by_video(videos)
+
+    cache_keys = [QueryCache.make_key(query, video_ids, RETRIEVAL_K) for query in queries]
+    results = [query_cache.get(cache_key) for cache_key in cache_keys]
+
+    # Embed every cache miss in a single API call, then search them concurrently
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        embeddings = get_embeddings()
+        query_embeddings = await embeddings.aembed_documents(
+            [queries[i] for i in misses],
+            **_query_embedding_kwargs(embeddings),
+        )
+        searched = await asyncio.gather(*(
+            _asearch_by_embedding(cache_keys[i], query_embedding, video_ids, chapter_summaries)
+            for i, query_embedding in zip(misses, query_embeddings)
+        ))
+        for i, result in zip(misses, searched):
+            results[i] = result
+
+    return _join_batch_results(queries, results)
+
+
+# Register sync and async implementations so agent.astream never blocks the event loop
+retrieve_context = StructuredTool.from_function(
+    func=_retrieve_context,
+    coroutine=_aretrieve_context,
+    name="retrieve_context",
+    response_format="content_and_artifact",
+)
+
+retrieve_context_batch = StructuredTool.from_function(
+    func=_retrieve_context_batch,
+    coroutine=_aretrieve_context_batch,
+    name="retrieve_context_batch",
+    response_format="content_and_artifact",
+)
 
 
 agent = create_agent(
     model=get_llm(),
-    tools=[retrieve_context],
+    tools=[retrieve_context, retrieve_context_batch],
     middleware=[
         inject_video_summaries,
         ModelRetryMiddleware(
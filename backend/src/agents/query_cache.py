@@ -0,0 +1,151 @@
+"""Query-level caches for transcript retrieval.
+
+``QueryCache`` caches ``retrieve_context`` results keyed on the query text,
+the active video IDs and ``k``, so a repeated question skips both the
+embedding call and the vector-store round trip. ``SemanticQueryCache`` sits
+behind it and reuses results for paraphrased questions whose embeddings are
+nearly identical to a recent one.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+from src.core.config import settings
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, tuple[float, frozenset[str], Any]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(query: str, video_ids: Iterable[str], k: int) -> bytes:
+        """Build a cache key that is independent of the video ID order."""
+        return hashlib.blake2b(
+            query.encode() + b"|" + ",".join(sorted(video_ids)).encode() + b"|" + str(k).encode()
+        ).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Return the cached value for ``key``, or ``None`` on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: bytes, video_ids: Iterable[str], value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, frozenset(video_ids), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop every entry whose results were drawn from ``video_id``."""
+        with self._lock:
+            stale = [key for key, (_, ids, _) in self._entries.items() if video_id in ids]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class _SemanticScope:
+    """Ring buffer of normalized query embeddings for one set of videos."""
+
+    def __init__(self, dim: int, max_size: int):
+        self.vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self.values: list[Any] = [None] * max_size
+        self.count = 0
+        self.next = 0
+
+
+class SemanticQueryCache:
+    """Thread-safe similarity cache over recent query embeddings.
+
+    Entries are scoped by the sorted video IDs a query ran against. A lookup
+    returns the cached value of the most similar previous query when its
+    cosine similarity reaches ``threshold``. Each scope holds at most
+    ``max_size`` entries and overwrites the oldest one first.
+    """
+
+    def __init__(self, threshold: float = 0.97, max_size: int = 512):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._scopes: dict[tuple[str, ...], _SemanticScope] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, video_ids: Iterable[str], embedding: Sequence[float]) -> Optional[Any]:
+        """Return the value cached for the closest query, or ``None`` below the threshold."""
+        with self._lock:
+            scope = self._scopes.get(tuple(sorted(video_ids)))
+            if scope is None or scope.count == 0:
+                return None
+
+            scores = scope.vectors[: scope.count] @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            return scope.values[best]
+
+    def put(self, video_ids: Iterable[str], embedding: Sequence[float], value: Any) -> None:
+        """Remember ``value`` as the result for ``embedding``."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            key = tuple(sorted(video_ids))
+            scope = self._scopes.get(key)
+            if scope is None or scope.vectors.shape[1] != vector.shape[0]:
+                scope = self._scopes[key] = _SemanticScope(vector.shape[0], self.max_size)
+
+            scope.vectors[scope.next] = vector
+            scope.values[scope.next] = value
+            scope.next = (scope.next + 1) % self.max_size
+            scope.count = min(scope.count + 1, self.max_size)
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop every scope that includes ``video_id``."""
+        with self._lock:
+            for key in [key for key in self._scopes if video_id in key]:
+                del self._scopes[key]
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._scopes.clear()
+
+
+query_cache = QueryCache(
+    max_size=settings.QUERY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+)
+
+semantic_query_cache = SemanticQueryCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_size=settings.SEMANTIC_CACHE_MAX_SIZE,
+)
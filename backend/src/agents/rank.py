@@ -0,0 +1,52 @@
+"""Maximal marginal relevance (MMR) reranking for retrieved transcript chunks."""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """Return the indices of ``k`` candidates chosen by maximal marginal relevance.
+
+    ``lambda_mult`` trades relevance to the query (1.0) against diversity
+    among the picked candidates (0.0). All pairwise similarities come from one
+    matrix product, and each candidate's redundancy is kept as a running
+    maximum, so a pick costs O(n) instead of re-scoring every selected vector.
+    """
+    n = len(candidate_embeddings)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    candidates = _normalize_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+
+    sim_qd = candidates @ query
+    sim_dd = candidates @ candidates.T
+
+    best = int(np.argmax(sim_qd))
+    picked = [best]
+    redundancy = sim_dd[best].copy()
+    available = np.ones(n, dtype=bool)
+    available[best] = False
+
+    while len(picked) < k:
+        scores = lambda_mult * sim_qd - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, sim_dd[best], out=redundancy)
+
+    return picked
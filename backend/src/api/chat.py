@@ -1,36 +1,69 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
 from langchain_core.messages.ai import AIMessageChunk
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.agents.chat_agent import YTAgentState, YoutubeVideo
-from src.api.deps import get_db, get_llm, get_embeddings, get_vector_store, get_agent
+from src.api.deps import get_db, get_ingest_llm, get_embeddings, get_vector_store, get_agent
 from src.core.models import Message
-from src.core.database import engine
+from src.core.database import AsyncSessionLocal
 from starlette.background import BackgroundTask
 from src.crud import thread as crud_thread
-from src.crud import video as crud_video
 from src.crud import message as crud_message
 from src.api.schemas import (
     CreateThreadRequest,
     CreateThreadResponse,
     SendMessageRequest,
     ThreadListItem,
+    ThreadListResponse,
     ThreadMessagesResponse,
     MessageResponse,
     DeleteThreadResponse,
     ErrorResponse,
 )
-import json
+import orjson
 from src.services.youtube_service import ingest_youtube_video
 from datetime import datetime
-import json
+from functools import lru_cache
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/threads", tags=["Threads"])
 
+# Disable caching and reverse-proxy buffering so tokens reach the client as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
+
+# Tokens are buffered until either threshold is reached
+SSE_FLUSH_CHARS = 64
+SSE_FLUSH_INTERVAL_SECONDS = 0.03
+
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+END_FRAME = b'data: {"type":"end"}\n\n'
+ERROR_FRAME = b'data: {"type":"error","error":"An error occurred during message generation."}\n\n'
+
+
+def _encode_token_frame(content: str) -> bytes:
+    return SSE_PREFIX + orjson.dumps({"type": "token", "content": content}) + SSE_SUFFIX
+
+
+# Short frames repeat often (single words, punctuation, newlines), so their encodings are memoized
+_cached_token_frame = lru_cache(maxsize=2048)(_encode_token_frame)
+
+
+def token_frame(content: str) -> bytes:
+    """Encode a token event as an SSE frame; bytes pass through StreamingResponse untouched."""
+    if len(content) < SSE_FLUSH_CHARS:
+        return _cached_token_frame(content)
+    return _encode_token_frame(content)
+
+
 # ──────────────────────────────────────────────
 # POST /threads — Create a new thread (ingest video)
 # ──────────────────────────────────────────────
@@ -43,7 +76,7 @@ router = APIRouter(prefix="/threads", tags=["Threads"])
 async def create_thread(
     request: CreateThreadRequest,
     session: AsyncSession = Depends(get_db),
-    llm = Depends(get_llm),
+    llm = Depends(get_ingest_llm),
     embeddings = Depends(get_embeddings),
     vector_store = Depends(get_vector_store),
 ):
@@ -51,11 +84,8 @@ async def create_thread(
     try:
         video_url = str(request.video_url)
         
-        # Ingest logic is now in the service layer
-        video = await ingest_youtube_video(video_url, session, llm, embeddings, vector_store)
-
-        # Create thread
-        thread = await crud_thread.create_thread(session, video.video_id, video.title)
+        # Ingest logic is now in the service layer; it also creates the thread
+        video, thread = await ingest_youtube_video(video_url, session, llm, embeddings, vector_store)
 
         return CreateThreadResponse(
             thread_id=thread.thread_id,
@@ -73,14 +103,19 @@ async def create_thread(
 
 
 # ──────────────────────────────────────────────
-# GET /threads — List all threads
+# GET /threads — List threads, newest first
 # ──────────────────────────────────────────────
 
-@router.get("", response_model=list[ThreadListItem])
-async def list_threads(session: AsyncSession = Depends(get_db)):
-    """List all conversation threads."""
-    threads = await crud_thread.get_all_threads(session)
-    return [
+@router.get("", response_model=ThreadListResponse)
+async def list_threads(
+    limit: int = Query(50, ge=1, le=200),
+    before: datetime | None = None,
+    before_id: str | None = None,
+    session: AsyncSession = Depends(get_db),
+):
+    """List conversation threads one page at a time, keyed on (created_at, thread_id)."""
+    threads = await crud_thread.get_threads_page(session, limit, before, before_id)
+    items = [
         ThreadListItem(
             thread_id=t.thread_id,
             title=t.title,
@@ -89,6 +124,11 @@ async def list_threads(session: AsyncSession = Depends(get_db)):
         )
         for t in threads
     ]
+    if len(items) == limit:
+        return ThreadListResponse(
+            items=items, next_cursor=items[-1].created_at, next_cursor_id=items[-1].thread_id
+        )
+    return ThreadListResponse(items=items)
 
 
 # ──────────────────────────────────────────────
@@ -126,14 +166,14 @@ async def send_message(
 ):
     """Send a user message and stream the AI response via SSE."""
 
-    response_context = {'content': "" }
+    # Streamed chunks are joined once when the reply is persisted
+    response_parts: list[str] = []
 
     try:
-        thread = await crud_thread.get_thread_by_id(session, thread_id)
+        thread, ytvideo = await crud_thread.get_thread_with_video(session, thread_id)
         if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
         
-        ytvideo = await crud_video.get_video_by_id(session, thread.video_id)
         if not ytvideo:
             raise HTTPException(status_code=404, detail="video not found")
         
@@ -150,24 +190,31 @@ async def send_message(
         logger.error(f"Error initializing message: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
     
+    # Build the agent input up front so the generator only drives the stream
+    config = {
+        "configurable": {
+            "thread_id": thread_id,
+        }
+    }
+
+    video = YoutubeVideo(
+        video_id=thread.video_id,
+        title=ytvideo.title,
+        summary=ytvideo.summary,
+        chapter_summaries=ytvideo.chapter_summaries or [],
+    )
+
+    input_state: YTAgentState = YTAgentState(
+        # content was already validated by SendMessageRequest, so skip re-validation
+        messages=[HumanMessage.model_construct(content=message.content, type="human")],
+        videos=[video]
+    )
+
     async def event_generator():
         try:
-            config = {
-                "configurable": {
-                    "thread_id": thread_id,
-                }
-            }
-            
-            video = YoutubeVideo(
-                video_id=thread.video_id,
-                title=ytvideo.title,
-                summary=ytvideo.summary
-            )
-
-            input_state: YTAgentState = YTAgentState(
-                messages=[HumanMessage(content=message.content)],
-                videos=[video]
-            )
+            # Coalesce adjacent tokens into fewer, larger frames
+            pending = ""
+            last_flush = time.monotonic()
 
             async for event in agent.astream(
                 input=input_state,
@@ -178,22 +225,33 @@ async def send_message(
                 
                 if isinstance(msg, AIMessageChunk):
                     content = msg.content
-                    response_context['content'] += content # type: ignore
-                    if content:
-                        yield f"data: {json.dumps({'type': 'token', 'content': content})}\n\n"
+                    response_parts.append(content) # type: ignore
+                    pending += content # type: ignore
+
+                if pending and (
+                    len(pending) >= SSE_FLUSH_CHARS
+                    or time.monotonic() - last_flush >= SSE_FLUSH_INTERVAL_SECONDS
+                ):
+                    yield token_frame(pending)
+                    pending = ""
+                    last_flush = time.monotonic()
+
+            if pending:
+                yield token_frame(pending)
 
-            yield f"data: {json.dumps({'type': 'end'})}\n\n"
+            yield END_FRAME
         except Exception as e:
             logger.error(f"Error during SSE generation: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'error': 'An error occurred during message generation.'})}\n\n"
+            yield ERROR_FRAME
 
     async def save_streamed_message():
         try:
-            if response_context['content']:
-                async with AsyncSession(engine, expire_on_commit=False) as bg_session:
+            content = "".join(response_parts)
+            if content:
+                async with AsyncSessionLocal() as bg_session:
                     ai_message = Message(
                         thread_id=thread_id,
-                        content=response_context['content'],
+                        content=content,
                         sender="ai",
                     )
                     await crud_message.create_message(session=bg_session, message=ai_message)
@@ -204,6 +262,7 @@ async def send_message(
         return StreamingResponse(
             event_generator(), 
             media_type="text/event-stream", 
+            headers=SSE_HEADERS,
             background=BackgroundTask(save_streamed_message)
         )
     except Exception as e:
@@ -223,25 +282,27 @@ async def send_message(
 async def get_messages(
     thread_id: str, 
     request: Request,
+    limit: int | None = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_db)
 ):
-    """Retrieve the message history for a thread."""
+    """Retrieve the message history for a thread, oldest first."""
     thread = await crud_thread.get_thread_by_id(session, thread_id)
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
 
-    messages_from_db = await crud_message.get_all_message_by_thread(session, thread_id)
+    # Only human/AI messages are returned; the sender filter runs in SQL
+    messages_from_db = await crud_message.get_chat_messages_by_thread(session, thread_id, limit, offset)
 
     messages = [
         MessageResponse(
             message_id=msg.message_id,
-            role="human" if msg.sender == "human" else "ai",
-            content=msg.content if isinstance(msg.content, str) else str(msg.content),
-            metadata=json.loads(msg.metadata_json) if msg.metadata_json else None,
+            role=msg.sender,
+            content=msg.content,
+            metadata=msg.metadata_json,
             created_at=msg.created_at,
         )
         for msg in messages_from_db
-        if msg.sender in ("human", "ai")
     ]
 
     return ThreadMessagesResponse(thread_id=thread_id, messages=messages)
\ No newline at end of file
@@ -1,48 +1,88 @@
+from functools import lru_cache
 from typing import AsyncGenerator
-from fastapi import Request
 from langchain_pinecone import PineconeVectorStore
 from sqlmodel.ext.asyncio.session import AsyncSession
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
+from langchain_community.cache import SQLiteCache
 from src.core.config import settings
-from src.core.database import engine
+from src.core.database import AsyncSessionLocal
 from pinecone import Pinecone
 import os
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting a database session."""
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with AsyncSessionLocal() as session:
         yield session
 
+# The model, embedding and vector-store clients are stateless, so each is built once
+# per process instead of on every request that depends on it
+
+@lru_cache(maxsize=1)
 def get_llm():
     """Dependency for getting the Language Model."""
     return ChatGoogleGenerativeAI(
       model=settings.FASTEST_LLM_MODEL,
     )
 
+@lru_cache(maxsize=1)
+def get_ingest_llm():
+    """Dependency for getting the Language Model used to summarize videos during ingest.
+
+    Identical prompts (e.g. chapter summaries of a re-ingested video) can be answered
+    from disk. The cache is attached to this model only, because a cache hit returns
+    the whole reply at once and would leave the chat agent's token stream empty.
+    """
+    cache = SQLiteCache(database_path=settings.LLM_CACHE_PATH) if settings.LLM_CACHE_ENABLED else None
+    return ChatGoogleGenerativeAI(
+      model=settings.FASTEST_LLM_MODEL,
+      cache=cache,
+    )
+
+@lru_cache(maxsize=1)
+def get_local_embeddings():
+    """Load the local sentence-transformers model once per process."""
+    try:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "`sentence-transformers` not installed. Please install using `uv add sentence-transformers` to use LOCAL_EMBEDDINGS"
+        )
+
+    return HuggingFaceEmbeddings(
+        model_name=settings.LOCAL_EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": 64, "normalize_embeddings": True},
+    )
+
+@lru_cache(maxsize=1)
 def get_embeddings():
     """Dependency for getting the Embeddings Model."""
+    if settings.LOCAL_EMBEDDINGS:
+        return get_local_embeddings()
+
     return GoogleGenerativeAIEmbeddings(
       model=settings.EMBEDDING_MODEL,
       output_dimensionality=settings.OUTPUT_DIMENSIONALITY # type: ignore
     )
 
-def get_vector_store():
-    """Dependency for getting the Vector Store."""
+@lru_cache(maxsize=1)
+def get_pinecone_index():
+    """Return the Pinecone index handle, resolved once per process.
 
+    Resolving an index by name calls the control plane to look up its host,
+    so the handle is cached rather than rebuilt for every search.
+    """
     pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
-    index = pc.Index(settings.PINECONE_INDEX_NAME)
+    return pc.Index(settings.PINECONE_INDEX_NAME)
 
-    return PineconeVectorStore(index=index, embedding=get_embeddings())
-
-    # chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
-
-    # return Chroma(
-    #   client=chroma_client,
-    #   collection_name=settings.CHROMA_COLLECTION_NAME,
-    #   embedding_function=get_embeddings()
-    # )
+@lru_cache(maxsize=1)
+def get_vector_store():
+    """Dependency for getting the Vector Store."""
+    return PineconeVectorStore(index=get_pinecone_index(), embedding=get_embeddings())
 
 
-def get_agent(request: Request):
-    """Dependency for getting the LangGraph agent tied to the app."""
-    return request.app.state.agent
+def get_agent():
+    """Dependency for getting the LangGraph agent, compiled once at import."""
+    # Imported lazily because chat_agent itself depends on this module
+    from src.agents.chat_agent import agent
+    return agent
@@ -46,6 +46,13 @@ class ThreadListItem(BaseModel):
     created_at: datetime
 
 
+class ThreadListResponse(BaseModel):
+    """Response for GET /threads — one page of threads, newest first."""
+    items: list[ThreadListItem]
+    next_cursor: datetime | None = None  # pass as ?before= to fetch the next page
+    next_cursor_id: str | None = None  # pass as ?before_id= alongside before
+
+
 class MessageResponse(BaseModel):
     """Single message in a thread's history."""
     message_id: str
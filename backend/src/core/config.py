@@ -7,7 +7,10 @@ configuration value parsing.
 
 import os
 from enum import Enum
+from functools import cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping
 
 from dotenv import load_dotenv
 
@@ -27,13 +30,16 @@ class Environment(str, Enum):
 
 
 # Determine environment
-def get_environment() -> Environment:
+def get_environment(env: Mapping[str, str] = os.environ) -> Environment:
     """Get the current environment.
 
+    Args:
+        env: Environment variables to read APP_ENV from
+
     Returns:
         Environment: The current environment (development, staging, production, or test)
     """
-    match os.getenv("APP_ENV", "development").lower():
+    match env.get("APP_ENV", "development").lower():
         case "production" | "prod":
             return Environment.PRODUCTION
         case "staging" | "stage":
@@ -44,8 +50,32 @@ def get_environment() -> Environment:
             return Environment.DEVELOPMENT
 
 
-# Load environment variables
-load_dotenv()
+# Per-environment defaults, applied to any setting not given explicitly in the environment
+ENVIRONMENT_OVERRIDES: Mapping[Environment, Mapping[str, Any]] = MappingProxyType({
+    Environment.DEVELOPMENT: {
+        "DEBUG": True,
+        "LOG_LEVEL": "DEBUG",
+        "LOG_FORMAT": "console",
+        "RATE_LIMIT_DEFAULT": ("1000 per day", "200 per hour"),
+    },
+    Environment.STAGING: {
+        "DEBUG": False,
+        "LOG_LEVEL": "INFO",
+        "RATE_LIMIT_DEFAULT": ("500 per day", "100 per hour"),
+    },
+    Environment.PRODUCTION: {
+        "DEBUG": False,
+        "LOG_LEVEL": "WARNING",
+        "RATE_LIMIT_DEFAULT": ("200 per day", "50 per hour"),
+    },
+    Environment.TEST: {
+        "DEBUG": True,
+        "LOG_LEVEL": "DEBUG",
+        "LOG_FORMAT": "console",
+        "RATE_LIMIT_DEFAULT": ("1000 per day", "1000 per hour"),  # Relaxed for testing
+    },
+})
+
 
 class Settings:
     """Application settings without using pydantic."""
@@ -57,95 +87,110 @@ class Settings:
         with appropriate defaults for each setting. Also applies
         environment-specific overrides based on the current environment.
         """
+        # Read the environment once; every setting below is a plain dict lookup
+        env = self._env = dict(os.environ)
+
         # Set the environment
-        self.ENVIRONMENT = get_environment()
+        self.ENVIRONMENT = get_environment(env)
 
         # Application Settings
-        self.PROJECT_NAME = os.getenv("PROJECT_NAME", "FastAPI LangGraph Template")
-        self.VERSION = os.getenv("VERSION", "1.0.0")
-        self.DESCRIPTION = os.getenv(
+        self.PROJECT_NAME = env.get("PROJECT_NAME", "FastAPI LangGraph Template")
+        self.VERSION = env.get("VERSION", "1.0.0")
+        self.DESCRIPTION = env.get(
             "DESCRIPTION", "A production-ready FastAPI template with LangGraph and Langfuse integration"
         )
-        self.API_V1_STR = os.getenv("API_V1_STR", "/api/v1")
-        self.DEBUG = os.getenv("DEBUG", "false").lower() in ("true", "1", "t", "yes")
+        self.API_V1_STR = env.get("API_V1_STR", "/api/v1")
+        self.DEBUG = env.get("DEBUG", "false").lower() in ("true", "1", "t", "yes")
 
         # RAG Configuration
-        self.PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "ask-youtube")
-        self.FAST_LLM_MODEL = os.getenv("FAST_LLM_MODEL", "gemini-2.5-flash")
-        self.FASTEST_LLM_MODEL = os.getenv("FASTEST_LLM_MODEL", "gemini-2.5-flash-lite")
-        self.SMART_LLM_MODEL = os.getenv("SMART_LLM_MODEL", "gemini-2.5-pro")
-        self.EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "gemini-embedding-001")
-        self.OUTPUT_DIMENSIONALITY = os.getenv("OUTPUT_DIMENSIONALITY", 768)
+        self.PINECONE_INDEX_NAME = env.get("PINECONE_INDEX_NAME", "ask-youtube")
+        self.FAST_LLM_MODEL = env.get("FAST_LLM_MODEL", "gemini-2.5-flash")
+        self.FASTEST_LLM_MODEL = env.get("FASTEST_LLM_MODEL", "gemini-2.5-flash-lite")
+        self.SMART_LLM_MODEL = env.get("SMART_LLM_MODEL", "gemini-2.5-pro")
+        self.EMBEDDING_MODEL = env.get("EMBEDDING_MODEL", "gemini-embedding-001")
+        self.OUTPUT_DIMENSIONALITY = env.get("OUTPUT_DIMENSIONALITY", 768)
+        # Local embeddings produce different vectors (384 dims for MiniLM), so they need their own index
+        self.LOCAL_EMBEDDINGS = env.get("LOCAL_EMBEDDINGS", "false").lower() in ("true", "1", "t", "yes")
+        self.LOCAL_EMBEDDING_MODEL = env.get("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.SYSTEM_PROMPT_REVISION = env.get("SYSTEM_PROMPT_REVISION", "")
+        # Over-fetch this many chunks per search, then keep a diverse top-k with MMR
+        self.RETRIEVAL_FETCH_K = int(env.get("RETRIEVAL_FETCH_K", "20"))
+        self.RETRIEVAL_MMR_LAMBDA = float(env.get("RETRIEVAL_MMR_LAMBDA", "0.5"))
+
+        # LLM Response Cache Configuration
+        self.LLM_CACHE_ENABLED = env.get("LLM_CACHE_ENABLED", "false").lower() in ("true", "1", "t", "yes")
+        self.LLM_CACHE_PATH = env.get("LLM_CACHE_PATH", ".langchain_cache.db")
+
+        # Vector Ingest Configuration
+        self.VECTOR_UPSERT_BATCH = int(env.get("VECTOR_UPSERT_BATCH", "100"))
+
+        # Retrieval Cache Configuration
+        self.QUERY_CACHE_MAX_SIZE = int(env.get("QUERY_CACHE_MAX_SIZE", "1024"))
+        self.QUERY_CACHE_TTL_SECONDS = float(env.get("QUERY_CACHE_TTL_SECONDS", "300"))
+        self.SEMANTIC_CACHE_MAX_SIZE = int(env.get("SEMANTIC_CACHE_MAX_SIZE", "512"))
+        self.SEMANTIC_CACHE_THRESHOLD = float(env.get("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+
+        # Optional; with a key, metadata and duration come from one YouTube Data API call
+        self.YOUTUBE_API_KEY = env.get("YOUTUBE_API_KEY")
+
+        # YouTube Lookup Cache Configuration
+        self.YOUTUBE_METADATA_CACHE_MAX_SIZE = int(env.get("YOUTUBE_METADATA_CACHE_MAX_SIZE", "4096"))
+        self.YOUTUBE_METADATA_CACHE_TTL_SECONDS = float(env.get("YOUTUBE_METADATA_CACHE_TTL_SECONDS", "86400"))
+        # Transcripts run to hundreds of KB each, so far fewer are kept
+        self.TRANSCRIPT_CACHE_MAX_SIZE = int(env.get("TRANSCRIPT_CACHE_MAX_SIZE", "128"))
+        self.TRANSCRIPT_CACHE_TTL_SECONDS = float(env.get("TRANSCRIPT_CACHE_TTL_SECONDS", "604800"))
+        # Transcripts are also written to disk, so a restarted worker doesn't refetch them from YouTube
+        self.YOUTUBE_DISK_CACHE_ENABLED = env.get("YOUTUBE_DISK_CACHE_ENABLED", "true").lower() in ("true", "1", "t", "yes")
+        self.YOUTUBE_DISK_CACHE_DIR = env.get("YOUTUBE_DISK_CACHE_DIR", ".youtube_cache")
+        self.YOUTUBE_DISK_CACHE_SIZE_LIMIT = int(env.get("YOUTUBE_DISK_CACHE_SIZE_LIMIT", "1000000000"))
 
         # JWT Configuration
-        self.JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "")
-        self.JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-        self.JWT_ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_DAYS", "30"))
+        self.JWT_SECRET_KEY = env.get("JWT_SECRET_KEY", "")
+        self.JWT_ALGORITHM = env.get("JWT_ALGORITHM", "HS256")
+        self.JWT_ACCESS_TOKEN_EXPIRE_DAYS = int(env.get("JWT_ACCESS_TOKEN_EXPIRE_DAYS", "30"))
 
         # Logging Configuration
-        self.LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
-        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  
-
-        self.DB_USER = os.getenv("DB_USER")
-        self.DB_PASSWORD = os.getenv("DB_PASSWORD")
-        self.DB_HOST = os.getenv("DB_HOST")  
-        self.DB_PORT = os.getenv("DB_PORT")  
-        self.DB_DBNAME = os.getenv("DB_DBNAME")  
-        self.DB_URL = os.getenv("DB_URL", f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_DBNAME}")
-
-        # Rate limit endpoints defaults
-        default_endpoints = {
-            "chat": ["30 per minute"],
-            "chat_stream": ["20 per minute"],
-            "messages": ["50 per minute"],
-            "register": ["10 per hour"],
-            "login": ["20 per minute"],
-            "root": ["10 per minute"],
-            "health": ["20 per minute"],
-        }
-
+        self.LOG_DIR = Path(env.get("LOG_DIR", "logs"))
+        self.LOG_LEVEL = env.get("LOG_LEVEL", "INFO")
+        self.LOG_FORMAT = env.get("LOG_FORMAT", "json")  
+
+        self.DB_USER = env.get("DB_USER")
+        self.DB_PASSWORD = env.get("DB_PASSWORD")
+        self.DB_HOST = env.get("DB_HOST")  
+        self.DB_PORT = env.get("DB_PORT")  
+        self.DB_DBNAME = env.get("DB_DBNAME")  
+        self.DB_URL = env.get("DB_URL", f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_DBNAME}")
+        self.DB_POOL_SIZE = int(env.get("DB_POOL_SIZE", "10"))
+        self.DB_MAX_OVERFLOW = int(env.get("DB_MAX_OVERFLOW", "20"))
+        self.DB_POOL_RECYCLE_SECONDS = int(env.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+        self.CHECKPOINT_POOL_SIZE = int(env.get("CHECKPOINT_POOL_SIZE", "5"))
+        # Create missing tables on startup; turn off once a deployment's schema exists
+        self.RUN_MIGRATIONS = env.get("RUN_MIGRATIONS", "true").lower() in ("true", "1", "t", "yes")
 
         # Apply environment-specific settings
         self.apply_environment_settings()
 
     def apply_environment_settings(self):
         """Apply environment-specific settings based on the current environment."""
-        env_settings = {
-            Environment.DEVELOPMENT: {
-                "DEBUG": True,
-                "LOG_LEVEL": "DEBUG",
-                "LOG_FORMAT": "console",
-                "RATE_LIMIT_DEFAULT": ["1000 per day", "200 per hour"],
-            },
-            Environment.STAGING: {
-                "DEBUG": False,
-                "LOG_LEVEL": "INFO",
-                "RATE_LIMIT_DEFAULT": ["500 per day", "100 per hour"],
-            },
-            Environment.PRODUCTION: {
-                "DEBUG": False,
-                "LOG_LEVEL": "WARNING",
-                "RATE_LIMIT_DEFAULT": ["200 per day", "50 per hour"],
-            },
-            Environment.TEST: {
-                "DEBUG": True,
-                "LOG_LEVEL": "DEBUG",
-                "LOG_FORMAT": "console",
-                "RATE_LIMIT_DEFAULT": ["1000 per day", "1000 per hour"],  # Relaxed for testing
-            },
-        }
-
-        # Get settings for current environment
-        current_env_settings = env_settings.get(self.ENVIRONMENT, {})
-
         # Apply settings if not explicitly set in environment variables
-        for key, value in current_env_settings.items():
+        for key, value in ENVIRONMENT_OVERRIDES.get(self.ENVIRONMENT, {}).items():
             env_var_name = key.upper()
             # Only override if environment variable wasn't explicitly set
-            if env_var_name not in os.environ:
+            if env_var_name not in self._env:
                 setattr(self, key, value)
 
 
-# Create settings instance
-settings = Settings()
+@cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, built on first use."""
+    # .env is parsed here, exactly once per process, rather than as an import side effect
+    load_dotenv()
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `from src.core.config import settings` resolves here, so Settings() is only
+    # constructed once something actually asks for it
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
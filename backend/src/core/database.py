@@ -1,10 +1,45 @@
 from sqlmodel import SQLModel 
-from sqlalchemy.pool import NullPool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
-from src.core.config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.core.config import Environment, settings
 
-engine = create_async_engine(settings.DB_URL, echo=True, poolclass=NullPool)
+# Echo formats every statement and its parameters through logging, so keep it to local development
+SQL_ECHO = settings.ENVIRONMENT == Environment.DEVELOPMENT
+
+# SQLite serves local development and tests; anything else is treated as Postgres
+IS_SQLITE = make_url(settings.DB_URL).get_backend_name() == "sqlite"
+
+if IS_SQLITE:
+    # SQLAlchemy already pools file databases (and uses a StaticPool for :memory:, which
+    # rejects sizing arguments), so the pragmas below run once per connection, not per session
+    engine = create_async_engine(settings.DB_URL, echo=SQL_ECHO)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers run alongside a writer, and NORMAL skips the per-commit fsync WAL doesn't need
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        # Read up to 256 MiB of the file through a memory map instead of read() syscalls
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+else:
+    # Keep connections open across requests; pre-ping drops ones the server closed while idle
+    engine = create_async_engine(
+        settings.DB_URL,
+        echo=SQL_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def init_db():
     async with engine.begin() as conn:
@@ -12,5 +47,5 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 async def get_db():    
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with AsyncSessionLocal() as session:
         yield session
@@ -140,6 +140,10 @@ def setup_logging() -> None:
         handlers=[file_handler, console_handler],
     )
 
+    # Statement logging is only wanted in development, where the engine echoes it
+    if settings.ENVIRONMENT != Environment.DEVELOPMENT:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
     # Configure structlog based on environment
     if settings.LOG_FORMAT == "console":
         # Development-friendly console logging
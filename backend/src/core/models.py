@@ -1,44 +1,91 @@
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, String
-import uuid
+from sqlalchemy import JSON, Column, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from uuid_utils import uuid7
+
+
+class utcnow(FunctionElement):
+    """Current UTC time, evaluated by the database."""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has second resolution in SQLite, which would tie messages sent together
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+def _timestamp_column(**kwargs) -> Column:
+    return Column(DateTime(timezone=True), server_default=utcnow(), nullable=False, **kwargs)
+
+def _new_id() -> str:
+    # UUIDv7 leads with a timestamp, so new rows append to the primary key index instead of splitting random pages
+    return str(uuid7())
+
+# Fetch server-generated timestamps in the INSERT itself (RETURNING), so they are never lazy-loaded
+_SERVER_DEFAULTS = {"eager_defaults": True}
 
 class YTVideo(SQLModel, table=True):
     __tablename__ = "yt_video"
+    __mapper_args__ = _SERVER_DEFAULTS
     
     video_id: str = Field(primary_key=True)
-    url: str
+    url: str = Field(index=True)
     title: str
     author_name: Optional[str] = None
     thumbnail_url: Optional[str] = None
     transcript: str
     duration: Optional[int] = Field(default=None)
     summary: str
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    # One summary per parent chunk, indexed by the parent_id stored in each vector's metadata
+    chapter_summaries: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
+    created_at: Optional[datetime] = Field(default=None, sa_column=_timestamp_column())
+    updated_at: Optional[datetime] = Field(default=None, sa_column=_timestamp_column(onupdate=utcnow()))
     
     threads: List["Thread"] = Relationship(back_populates="video")
 
+class ChapterSummary(SQLModel, table=True):
+    """Progress of an in-flight ingest, so a retry can skip finished chapters."""
+    __tablename__ = "chapter_summaries"
+
+    video_id: str = Field(primary_key=True)
+    parent_id: int = Field(primary_key=True)
+    text: str
+    embedded: bool = False
+
 class Thread(SQLModel, table=True):
     __tablename__ = "threads"
+    __mapper_args__ = _SERVER_DEFAULTS
     
-    thread_id: str = Field(primary_key=True, default_factory=lambda: str(uuid.uuid4()))
-    video_id: str = Field(foreign_key="yt_video.video_id")
+    thread_id: str = Field(primary_key=True, default_factory=_new_id)
+    video_id: str = Field(foreign_key="yt_video.video_id", index=True)
     title: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: Optional[datetime] = Field(default=None, sa_column=_timestamp_column(index=True))
     
     video: YTVideo = Relationship(back_populates="threads")
-    messages: List["Message"] = Relationship(back_populates="thread")
+    messages: List["Message"] = Relationship(back_populates="thread", passive_deletes=True)
 
 class Message(SQLModel, table=True):
     __tablename__ = "messages"
+    __mapper_args__ = _SERVER_DEFAULTS
+    # Serves both the thread_id filter and the created_at ordering of a thread's history
+    __table_args__ = (Index("ix_messages_thread_id_created_at", "thread_id", "created_at"),)
     
-    message_id: str = Field(primary_key=True, default_factory=lambda: str(uuid.uuid4()))
-    thread_id: str = Field(foreign_key="threads.thread_id")
+    message_id: str = Field(primary_key=True, default_factory=_new_id)
+    thread_id: str = Field(foreign_key="threads.thread_id", ondelete="CASCADE")
     sender: str
     content: str
-    metadata_json: Optional[str] = Field(default=None, sa_column=Column("metadata", String)) # Using string for JSON for simplicity in SQLite or use specialized types if needed
-    created_at: datetime = Field(default_factory=datetime.now)
+    # Native JSONB on Postgres, so metadata is stored and read as a dict with no manual (de)serialization
+    metadata_json: Optional[dict] = Field(
+        default=None, sa_column=Column("metadata", JSON().with_variant(JSONB(), "postgresql"))
+    )
+    created_at: Optional[datetime] = Field(default=None, sa_column=_timestamp_column())
     
     thread: Thread = Relationship(back_populates="messages")
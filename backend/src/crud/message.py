@@ -1,6 +1,4 @@
-from typing import Literal
-
-from src.core.models import YTVideo, Thread, Message
+from src.core.models import Message
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -10,6 +8,19 @@ async def create_message(session: AsyncSession, message:Message) -> Message:
   await session.refresh(message)
   return message
 
-async def get_all_message_by_thread(session: AsyncSession, thread_id: str) -> list[Message]:
-  result = await session.exec(select(Message).where(Message.thread_id == thread_id))
+async def get_chat_messages_by_thread(
+  session: AsyncSession, thread_id: str, limit: int | None = None, offset: int = 0
+) -> list[Message]:
+  """Fetch a thread's human/AI messages in order, filtered and paginated in SQL."""
+  query = (
+    select(Message)
+    .where(Message.thread_id == thread_id, Message.sender.in_(("human", "ai")))
+    # created_at can tie; message IDs are UUIDv7, so they break ties in insert order and
+    # keep offset pages stable
+    .order_by(Message.created_at, Message.message_id)
+    .offset(offset)
+  )
+  if limit is not None:
+    query = query.limit(limit)
+  result = await session.exec(query)
   return list(result.all())
\ No newline at end of file
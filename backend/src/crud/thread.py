@@ -1,39 +1,70 @@
-from typing import List, Optional
-from sqlmodel import select
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import selectinload
+from sqlmodel import and_, delete, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.core.models import Thread, Message
+from src.core.models import Thread, Message, YTVideo
 
 async def get_thread_by_id(session: AsyncSession, thread_id: str) -> Optional[Thread]:
     """Retrieve a single thread by its ID."""
     result = await session.exec(select(Thread).where(Thread.thread_id == thread_id))
     return result.first()
 
-async def get_all_threads(session: AsyncSession) -> List[Thread]:
-    """Retrieve all threads."""
-    result = await session.exec(select(Thread))
-    return list(result.all())
+async def get_thread_with_video(
+    session: AsyncSession, thread_id: str
+) -> Tuple[Optional[Thread], Optional[YTVideo]]:
+    """Retrieve a thread and its video in a single round trip."""
+    result = await session.exec(
+        select(Thread, YTVideo)
+        .join(YTVideo, YTVideo.video_id == Thread.video_id, isouter=True)
+        .where(Thread.thread_id == thread_id)
+    )
+    row = result.first()
+    if not row:
+        return None, None
+    return row[0], row[1]
 
-async def create_thread(session: AsyncSession, video_id: str, title: str) -> Thread:
-    """Create a new thread."""
-    thread = Thread(video_id=video_id, title=title)
-    session.add(thread)
-    await session.commit()
-    await session.refresh(thread)
-    return thread
+def _threads_page_query(limit: int, before: Optional[datetime], before_id: Optional[str]):
+    # created_at is not unique, so the thread ID (a time-ordered UUIDv7) breaks ties and
+    # threads sharing a timestamp across a page boundary are neither skipped nor repeated
+    query = select(Thread).order_by(Thread.created_at.desc(), Thread.thread_id.desc()).limit(limit)
+    if before is not None:
+        if before_id is None:
+            query = query.where(Thread.created_at < before)
+        else:
+            query = query.where(
+                or_(
+                    Thread.created_at < before,
+                    and_(Thread.created_at == before, Thread.thread_id < before_id),
+                )
+            )
+    return query
 
-async def delete_thread_with_messages(session: AsyncSession, thread_id: str) -> bool:
-    """Delete a thread and all associated messages."""
-    thread = await get_thread_by_id(session, thread_id)
-    if not thread:
-        return False
+async def get_threads_page(
+    session: AsyncSession, limit: int, before: Optional[datetime] = None, before_id: Optional[str] = None
+) -> List[Thread]:
+    """Retrieve up to ``limit`` threads that sort after the ``(before, before_id)`` cursor, newest first."""
+    result = await session.exec(_threads_page_query(limit, before, before_id))
+    return list(result.all())
+
+async def get_threads_page_with_videos(
+    session: AsyncSession, limit: int, before: Optional[datetime] = None, before_id: Optional[str] = None
+) -> List[Thread]:
+    """Like ``get_threads_page``, with each thread's ``video`` loaded in one extra query.
 
-    # Delete associated messages first
-    messages_result = await session.exec(
-        select(Message).where(Message.thread_id == thread_id)
+    Async sessions cannot lazy-load, so callers that read ``thread.video`` must use this.
+    Messages are not loaded; page through them with ``get_chat_messages_by_thread``.
+    """
+    result = await session.exec(
+        _threads_page_query(limit, before, before_id).options(selectinload(Thread.video))
     )
-    for msg in messages_result.all():
-        await session.delete(msg)
+    return list(result.all())
 
-    await session.delete(thread)
+async def delete_thread_with_messages(session: AsyncSession, thread_id: str) -> bool:
+    """Delete a thread and all associated messages."""
+    # Two set-based DELETEs, no row loading. Messages are removed explicitly because the
+    # FK cascade only exists on tables created after it was added to the model
+    await session.exec(delete(Message).where(Message.thread_id == thread_id))
+    result = await session.exec(delete(Thread).where(Thread.thread_id == thread_id))
     await session.commit()
-    return True
+    return result.rowcount > 0
@@ -4,9 +4,8 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from src.core.models import YTVideo
 
 async def get_video_by_id(session: AsyncSession, video_id: str) -> Optional[YTVideo]:
-    """Retrieve a video by its ID."""
-    result = await session.exec(select(YTVideo).where(YTVideo.video_id == video_id))
-    return result.first()
+    """Retrieve a video by its ID, from the session's identity map when already loaded."""
+    return await session.get(YTVideo, video_id)
 
 async def get_video_by_url(session: AsyncSession, url: str) -> Optional[YTVideo]:
     """Retrieve a video by its URL."""
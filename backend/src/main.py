@@ -1,23 +1,60 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from src.api import chat
 from src.agents.chat_agent import agent
 from src.core.config import settings
-from src.core.database import init_db
+from src.core.database import IS_SQLITE, init_db
+from src.services.youtube_tools import YouTubeTools
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 from contextlib import asynccontextmanager
+from sqlalchemy.engine import make_url
 import uvicorn
 
 
+@asynccontextmanager
+async def open_checkpointer():
+    """Open a LangGraph checkpointer on the same database as the application."""
+    db_url = make_url(settings.DB_URL)
+    if IS_SQLITE:
+        async with AsyncSqliteSaver.from_conn_string(db_url.database or ":memory:") as checkpointer:
+            yield checkpointer
+        return
+
+    checkpoint_conn_string = db_url.set(drivername="postgresql").render_as_string(hide_password=False)
+    # A pool rather than one connection, so concurrent chats don't queue on a single checkpoint connection
+    async with AsyncConnectionPool(
+        checkpoint_conn_string,
+        max_size=settings.CHECKPOINT_POOL_SIZE,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=False,
+    ) as pool:
+        yield AsyncPostgresSaver(pool)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
-    async with AsyncPostgresSaver.from_conn_string(f"dbname={settings.DB_DBNAME} user={settings.DB_USER} password={settings.DB_PASSWORD} host={settings.DB_HOST} port={settings.DB_PORT}") as checkpointer:
-        agent.checkpointer = checkpointer
-        app.state.agent = agent
-        yield
+    if settings.RUN_MIGRATIONS:
+        await init_db()
+    # Checkpoints live in the application database so thread state survives restarts
+    # and is shared across workers
+    try:
+        async with open_checkpointer() as checkpointer:
+            if settings.RUN_MIGRATIONS:
+                await checkpointer.setup()
+            agent.checkpointer = checkpointer
+            app.state.agent = agent
+            yield
+    finally:
+        # The YouTube HTTP clients are shared by every request; release their
+        # sockets even when startup or shutdown fails part way through
+        await YouTubeTools.close()
 
-app = FastAPI(lifespan=lifespan)
+# Render every JSON response with orjson instead of the stdlib encoder
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
    "https://ask-youtubee.vercel.app",
@@ -33,9 +70,12 @@ app.add_middleware(
 
 app.include_router(chat.router, prefix=settings.API_V1_STR)
 
+# Probes hit this constantly, so the encoded response is built once and served as-is
+HEALTH_RESPONSE = ORJSONResponse({"status": "ok"})
+
 @app.get('/')
 async def health():
-    return {"status": "ok"}
+    return HEALTH_RESPONSE
 
 if __name__ == "__main__":
     uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,53 +1,208 @@
+import asyncio
+import itertools
 import logging
 from fastapi import HTTPException
-from sqlmodel import select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.embeddings import Embeddings
-from langchain_core.vectorstores import VectorStore
+from langchain_pinecone import PineconeVectorStore
 
-from src.core.models import YTVideo
+from src.agents.query_cache import query_cache, semantic_query_cache
+from src.core.config import settings
+from src.core.models import ChapterSummary, Thread, YTVideo
+from src.crud.video import get_video_by_id
 from src.services.youtube_tools import YouTubeTools
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent chapter-summary LLM calls, to stay within Gemini rate limits
+CHAPTER_SUMMARY_CONCURRENCY = 8
+
+# Shared by every ingest in the process, so concurrent ingests together stay under the bound
+_chapter_summary_semaphore = asyncio.Semaphore(CHAPTER_SUMMARY_CONCURRENCY)
+
+# Upper bounds on concurrent embedding requests and vector upserts during ingest
+EMBEDDING_CONCURRENCY = 4
+VECTOR_UPSERT_CONCURRENCY = 2
+_embedding_semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+_vector_upsert_semaphore = asyncio.Semaphore(VECTOR_UPSERT_CONCURRENCY)
+
+# Transcripts shorter than this span at most two parent chunks, so one summary call covers them
+SHORT_TRANSCRIPT_CHARS = 6000
+
+# Splitters are stateless, so one instance serves every ingest
+PARENT_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=300)
+CHILD_CHUNK_SIZE = 500
+CHILD_CHUNK_OVERLAP = 100
+
+# One lock per video being ingested, so concurrent requests for it run the pipeline once.
+# Each entry counts the requests holding or waiting on it and is dropped when the last one leaves
+_video_locks: dict[str, asyncio.Lock] = {}
+_video_lock_users: dict[str, int] = {}
+
+
+def _windowed(text: str, size: int, overlap: int) -> list[str]:
+    """Split ``text`` into windows of at most ``size`` chars overlapping by up to ``overlap``.
+
+    Windows end and restart on spaces where possible so words are not cut in half.
+    """
+    chunks = []
+    start, length = 0, len(text)
+    while start < length:
+        end = start + size
+        if end >= length:
+            chunks.append(text[start:])
+            break
+        cut = text.rfind(" ", start + overlap + 1, end)
+        if cut != -1:
+            end = cut
+        chunks.append(text[start:end])
+        next_start = end - overlap
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+def _global_summary_prompt(combined_summaries: str) -> str:
+    return f"""You are creating a global summary of a YouTube video based on its section summaries.
+
+    This summary will be shown to users who want to quickly understand what the entire video covers before asking questions about it.
+
+    Chapter summaries:
+    {combined_summaries}
+
+    Task: Write a 4-6 sentence global summary that:
+    1. Opens with the video's central topic and purpose
+    2. Covers the main themes/phases in logical order
+    3. Highlights the most important takeaways or conclusions
+    4. Uses language a reader unfamiliar with the topic can understand
+
+    Do not use bullet points. Write in flowing prose. Do not reference "chapters" or "sections" explicitly.
+
+    Global Summary:"""
+
+
+def _transcript_summary_prompt(transcript: str) -> str:
+    return f"""You are creating a global summary of a short YouTube video from its full transcript.
+
+    This summary will be shown to users who want to quickly understand what the entire video covers before asking questions about it.
+
+    Transcript:
+    \"\"\"
+    {transcript}
+    \"\"\"
+
+    Task: Write a 4-6 sentence global summary that:
+    1. Opens with the video's central topic and purpose
+    2. Covers the main points in the order they appear
+    3. Highlights the most important takeaways or conclusions
+    4. Uses language a reader unfamiliar with the topic can understand
+
+    Do not use bullet points. Write in flowing prose. Do not mention timestamps.
+
+    Global Summary:"""
+
+
+def _raise_first_error(results: list) -> None:
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def _child_chunks(video_id: str, parent_docs: list, checkpoints: dict[int, ChapterSummary]):
+    """Yield ``(id, metadata)`` for each child chunk of the parents not yet embedded."""
+    for p_index, parent_doc in enumerate(parent_docs):
+        if p_index in checkpoints and checkpoints[p_index].embedded:
+            continue
+
+        # Plain offset slicing is enough for children; the recursive splitter already shaped the parents
+        for c_index, chunk_text in enumerate(_windowed(parent_doc.page_content, CHILD_CHUNK_SIZE, CHILD_CHUNK_OVERLAP)):
+            yield f"{video_id}_P{p_index}_C{c_index}", {
+                "video_id": video_id,
+                "chunk_index": c_index,
+                "parent_id": p_index,
+                "text": chunk_text,
+            }
+
+
+async def _open_thread(session: AsyncSession, video: YTVideo) -> tuple[YTVideo, Thread]:
+    # The ID is generated client-side and created_at comes back from the INSERT, so no refresh is needed
+    thread = Thread(video_id=video.video_id, title=video.title)
+    session.add(thread)
+    await session.commit()
+    return video, thread
+
+
 async def ingest_youtube_video(
     video_url: str, 
     session: AsyncSession,
     llm: BaseChatModel,
     embeddings: Embeddings,
-    vector_store: VectorStore
-) -> YTVideo:
-    """Ingests a YouTube video: fetches transcript, chunks, summarizes, embeds, and saves to DB."""
-    video_id = YouTubeTools.get_youtube_video_id(video_url)
+    vector_store: PineconeVectorStore
+) -> tuple[YTVideo, Thread]:
+    """Ingests a YouTube video if it is new (transcript, chunks, summaries, embeddings) and opens a thread on it.
+
+    A newly ingested video and its thread are saved in a single commit.
+    """
+    video_id = await YouTubeTools.get_youtube_video_id(video_url)
     if not video_id:
         raise HTTPException(status_code=400, detail="Invalid YouTube URL")
 
     # Check if video already exists
-    result = await session.exec(select(YTVideo).where(YTVideo.video_id == video_id))
-    video = result.first()
-
+    video = await get_video_by_id(session, video_id)
     if video:
-        return video
-    
+        return await _open_thread(session, video)
+
+    lock = _video_locks.setdefault(video_id, asyncio.Lock())
+    _video_lock_users[video_id] = _video_lock_users.get(video_id, 0) + 1
     try:
-        duration = YouTubeTools.get_video_duration(video_url)
-        if duration and duration > 1200:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Video is too long ({duration}s). Maximum allowed duration is 1200 seconds (20 minutes)."
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.warning(f"Failed to fetch duration for {video_id}: {e}")
+        async with lock:
+            # Another request may have finished ingesting this video while we waited
+            video = await get_video_by_id(session, video_id)
+            if video:
+                return await _open_thread(session, video)
+            return await _ingest_new_video(video_id, video_url, session, llm, embeddings, vector_store)
+    finally:
+        # lock.locked() is already False while a woken waiter has yet to re-acquire the lock,
+        # so only a count of the remaining users says when the entry is safe to drop
+        _video_lock_users[video_id] -= 1
+        if not _video_lock_users[video_id]:
+            del _video_lock_users[video_id]
+            del _video_locks[video_id]
+
+
+async def _ingest_new_video(
+    video_id: str,
+    video_url: str,
+    session: AsyncSession,
+    llm: BaseChatModel,
+    embeddings: Embeddings,
+    vector_store: PineconeVectorStore
+) -> tuple[YTVideo, Thread]:
+    # Duration, metadata and transcript are independent lookups, so their round trips overlap
+    duration, video_info, transcript = await asyncio.gather(
+        YouTubeTools.get_video_duration(video_url),
+        YouTubeTools.get_video_data(video_url),
+        YouTubeTools.get_video_timestamps(video_url),
+        return_exceptions=True,
+    )
+
+    if isinstance(duration, HTTPException):
+        raise duration
+    if isinstance(duration, Exception):
+        logger.warning(f"Failed to fetch duration for {video_id}: {duration}")
         duration = None
+    if duration and duration > 1200:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Video is too long ({duration}s). Maximum allowed duration is 1200 seconds (20 minutes)."
+        )
+    _raise_first_error([video_info, transcript])
 
     logger.info(f"Ingesting new video: {video_id}")
-    video_info = YouTubeTools.get_video_data(video_url)
-    transcript = await YouTubeTools.get_video_timestamps(video_url)
-    
 
     if not transcript or transcript.startswith("No captions"):
         raise HTTPException(
@@ -55,17 +210,17 @@ async def ingest_youtube_video(
             detail="No transcript available for this video",
         )
 
-    parent_splitter = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=300)
-    child_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    # Recursive splitting of a long transcript takes tens of milliseconds, too long to hold the event loop
+    parent_docs = await asyncio.to_thread(PARENT_SPLITTER.create_documents, [transcript])
 
-    parent_docs = (doc for doc in parent_splitter.create_documents([transcript]))
+    # Chapters summarized, and possibly embedded, by an earlier attempt that failed
+    result = await session.exec(select(ChapterSummary).where(ChapterSummary.video_id == video_id))
+    checkpoints = {row.parent_id: row for row in result.all()}
 
-    ids = []
-    metadatas = []
-    texts = []
-    chapter_summaries_list = []
+    async def summarize_chapter(p_index: int, parent_doc) -> str:
+        if p_index in checkpoints:
+            return checkpoints[p_index].text
 
-    for p_index, parent_doc in enumerate(parent_docs):
         chapter_prompt = f"""You are summarizing a section of a YouTube video transcript for use in a retrieval-augmented search system.
 
         Your goal is to write a dense, information-rich summary that preserves:
@@ -85,59 +240,76 @@ async def ingest_youtube_video(
         \"\"\"
 
         Summary:"""
-        
-        chapter_summary_res = await llm.ainvoke(chapter_prompt)
-        chapter_context = chapter_summary_res.content
 
-        chapter_summaries_list.append(chapter_context)
+        # Chapter summaries are independent, so they are requested concurrently
+        async with _chapter_summary_semaphore:
+            chapter_summary_res = await llm.ainvoke(chapter_prompt)
 
-        child_chunks = child_splitter.split_text(parent_doc.page_content)
+        checkpoints[p_index] = ChapterSummary(
+            video_id=video_id, parent_id=p_index, text=chapter_summary_res.content
+        )
+        session.add(checkpoints[p_index])
+        return chapter_summary_res.content
 
-        for c_index, chunk_text in enumerate(child_chunks):
-            doc_id = f"{video_id}_P{p_index}_C{c_index}"
-            ids.append(doc_id)
-            texts.append(chunk_text)
-            metadatas.append({
-                "video_id": video_id,
-                "chunk_index": c_index,
-                "parent_id": p_index,
-                "chapter_summary": chapter_context,
-            })
+    # Child chunks are windowed lazily and pulled in batches by a fixed set of workers,
+    # so only the batches in flight are held alongside the transcript
+    batches = itertools.batched(_child_chunks(video_id, parent_docs, checkpoints), settings.VECTOR_UPSERT_BATCH)
+    upserted, failed = set(), set()
+    upsert_errors = []
 
-    combined_summaries = "\n- ".join(chapter_summaries_list)
-    global_summary_prompt = f"""You are creating a global summary of a YouTube video based on its section summaries.
+    async def upsert_worker() -> None:
+        for batch in batches:
+            parent_ids = {metadata["parent_id"] for _, metadata in batch}
+            try:
+                async with _embedding_semaphore:
+                    batch_embeddings = await embeddings.aembed_documents([metadata["text"] for _, metadata in batch])
+                async with _vector_upsert_semaphore:
+                    # Upsert the vectors directly; aadd_texts would embed the texts a second time
+                    await asyncio.to_thread(
+                        vector_store.index.upsert,
+                        vectors=[
+                            (doc_id, values, metadata)
+                            for (doc_id, metadata), values in zip(batch, batch_embeddings, strict=True)
+                        ],
+                    )
+            except Exception as e:
+                failed.update(parent_ids)
+                upsert_errors.append(e)
+            else:
+                upserted.update(parent_ids)
 
-    This summary will be shown to users who want to quickly understand what the entire video covers before asking questions about it.
+    # Chunk metadata does not depend on the summaries, so vectors are embedded and
+    # upserted while the chapters are being summarized
+    upsert_task = asyncio.gather(*(upsert_worker() for _ in range(EMBEDDING_CONCURRENCY)))
+    try:
+        if len(transcript) < SHORT_TRANSCRIPT_CHARS:
+            # Short videos skip chapter summaries and are summarized from the transcript directly
+            chapter_summaries_list = []
+            global_summary_prompt = _transcript_summary_prompt(transcript)
+        else:
+            chapter_summaries_list = await asyncio.gather(
+                *(summarize_chapter(p_index, parent_doc) for p_index, parent_doc in enumerate(parent_docs)),
+                return_exceptions=True,
+            )
+            _raise_first_error(chapter_summaries_list)
+            global_summary_prompt = _global_summary_prompt("\n- ".join(chapter_summaries_list))
 
-    Chapter summaries:
-    {combined_summaries}
+        global_summary_res = await llm.ainvoke(global_summary_prompt)
+        video_global_summary = global_summary_res.content
+    finally:
+        await upsert_task
 
-    Task: Write a 4-6 sentence global summary that:
-    1. Opens with the video's central topic and purpose
-    2. Covers the main themes/phases in logical order
-    3. Highlights the most important takeaways or conclusions
-    4. Uses language a reader unfamiliar with the topic can understand
+        # Mark chapters whose chunks all landed so a retry does not embed them again
+        for p_index in (upserted - failed) & checkpoints.keys():
+            checkpoints[p_index].embedded = True
 
-    Do not use bullet points. Write in flowing prose. Do not reference "chapters" or "sections" explicitly.
+        # Keep the finished summaries and embedded chapters before surfacing any failure
+        await session.commit()
+    _raise_first_error(upsert_errors)
 
-    Global Summary:"""
-    
-    global_summary_res = await llm.ainvoke(global_summary_prompt)
-    video_global_summary = global_summary_res.content
-
-    batch_size = 100
-    for i in range(0, len(texts), batch_size):
-        batch_ids = ids[i : i + batch_size]
-        batch_texts = texts[i : i + batch_size]
-        batch_metadatas = metadatas[i : i + batch_size]
-
-        batch_embeddings = await embeddings.aembed_documents(batch_texts)
-        await vector_store.aadd_texts(
-            ids=batch_ids,
-            texts=batch_texts,
-            embeddings=batch_embeddings,
-            metadatas=batch_metadatas,
-        )
+    # Any cached retrievals scoped to this video predate its vectors
+    query_cache.invalidate(video_id)
+    semantic_query_cache.invalidate(video_id)
 
     # Insert video into DB
     video = YTVideo(
@@ -149,9 +321,21 @@ async def ingest_youtube_video(
         transcript=transcript,
         duration=duration,
         summary=video_global_summary,  # type: ignore
+        chapter_summaries=list(chapter_summaries_list),
     )
-    session.add(video)
-    await session.commit()
-    await session.refresh(video)
+    thread = Thread(video_id=video_id, title=video.title)
+    try:
+        # The video row now holds everything the checkpoints were tracking. The DELETE runs
+        # first so it cannot autoflush the INSERTs outside this try
+        await session.exec(delete(ChapterSummary).where(ChapterSummary.video_id == video_id))
+        session.add_all([video, thread])
+        await session.commit()
+    except IntegrityError:
+        # Another worker process inserted the same video first
+        await session.rollback()
+        existing = await get_video_by_id(session, video_id)
+        if existing is None:
+            raise
+        return await _open_thread(session, existing)
 
-    return video
+    return video, thread
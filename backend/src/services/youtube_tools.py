@@ -1,352 +1,594 @@
-import json
+import logging
 import re
 import asyncio
-from urllib.parse import urlparse, parse_qs, urlencode
-from urllib.request import urlopen
-from typing import Optional, List
-from datetime import datetime
-
+import threading
+from functools import lru_cache
+from urllib.parse import urlencode
+from typing import Any, Iterable, Optional, List
+
+import diskcache
+import httpx
+import orjson
+import requests
 from fastapi import HTTPException
-from dotenv import load_dotenv
-
-
-try:
-    load_dotenv()
-    print(f"[{datetime.now()}] Environment variables loaded from .env file")
-except ImportError:
-    print(f"[{datetime.now()}] load_env.py not found - using system environment variables only")
-except Exception as e:
-    print(f"[{datetime.now()}] Error loading .env file: {e}")
-
-try:
-    from youtube_transcript_api import YouTubeTranscriptApi
-    from youtube_transcript_api.proxies import WebshareProxyConfig
-    print(f"[{datetime.now()}] Successfully imported YouTubeTranscriptApi and WebshareProxyConfig")
-except ImportError:
-    print(f"[{datetime.now()}] ERROR: Failed to import youtube_transcript_api")
-    raise ImportError(
-        "`youtube_transcript_api` not installed. Please install using `pip install youtube_transcript_api`"
-    )
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.agents.query_cache import QueryCache
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared across calls so requests to youtube.com reuse pooled keep-alive connections
+# instead of paying a TCP and TLS handshake each time. httpx already asks for gzip and
+# decompresses transparently; HTTP/2 is used when the optional h2 package is installed.
+# The client is async so lookups run on the event loop instead of in worker threads. It is
+# created on first use and again after close(), so a restarted app gets a working client
+_http: Optional[httpx.AsyncClient] = None
+
+
+def _get_http() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            http2=True,
+            # Fail fast on connect and on waiting for a pooled connection; give reads more room
+            timeout=httpx.Timeout(connect=3.0, read=8.0, write=3.0, pool=5.0),
+            follow_redirects=True,
+            # Sized for bursts of concurrent ingests, with idle connections kept warm for a minute
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60.0),
+        )
+    return _http
+
+# The transcript API talks to youtube.com through requests, so it gets its own pooled session,
+# with a few retries on transient failures. The API itself is created on the first transcript call
+_transcript_session = requests.Session()
+_transcript_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504)),
+)
+_transcript_session.mount("https://", _transcript_adapter)
+_transcript_session.mount("http://", _transcript_adapter)
+
+
+
+# Stays None until the first transcript lookup, so close() never has to open it just to close it
+_disk_cache: Optional[diskcache.Cache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def _get_disk_cache() -> Optional[diskcache.Cache]:
+    """Open the on-disk cache shared by every worker on first use, or return ``None`` if disabled."""
+    global _disk_cache
+    if not settings.YOUTUBE_DISK_CACHE_ENABLED:
+        return None
+    # Called from worker threads, so guard against two of them opening it at once
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = diskcache.Cache(
+                settings.YOUTUBE_DISK_CACHE_DIR, size_limit=settings.YOUTUBE_DISK_CACHE_SIZE_LIMIT
+            )
+        return _disk_cache
+
+
+class _TieredCache(QueryCache):
+    """In-memory LRU cache backed by the on-disk cache, so entries survive a restart.
+
+    Disk reads and writes block, so this is only used from worker threads. Values must
+    be plain data (dicts, lists, strings), which keeps the disk format independent of
+    third-party classes.
+    """
+
+    def get(self, key: bytes) -> Optional[Any]:
+        value = super().get(key)
+        disk = _get_disk_cache()
+        if value is None and disk is not None:
+            entry = disk.get(key)
+            if entry is not None:
+                video_ids, value = entry
+                super().put(key, video_ids, value)
+        return value
+
+    def put(self, key: bytes, video_ids: Iterable[str], value: Any) -> None:
+        video_ids = list(video_ids)
+        super().put(key, video_ids, value)
+        disk = _get_disk_cache()
+        if disk is not None:
+            disk.set(key, (video_ids, value), expire=self.ttl_seconds)
+
+
+# Video metadata, durations and transcripts don't change once published, so lookups are cached
+# per video. Only successful results are stored; failures are retried on the next call.
+# Metadata is read on the event loop, so it stays in memory; transcripts are read in worker
+# threads and are also kept on disk
+_metadata_cache = QueryCache(
+    max_size=settings.YOUTUBE_METADATA_CACHE_MAX_SIZE,
+    ttl_seconds=settings.YOUTUBE_METADATA_CACHE_TTL_SECONDS,
+)
+_transcript_cache = _TieredCache(
+    max_size=settings.TRANSCRIPT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+)
+
+# youtu.be/<id>, youtube.com/watch?...v=<id>, youtube.com/embed/<id> and youtube.com/v/<id>
+# Scheme and host are case-insensitive, as they are in a URL; the path and the ID are not
+_VIDEO_ID_RE = re.compile(
+    r"(?i:https?://)?(?:(?i:youtu\.be)/|(?i:(?:www\.)?youtube\.com)/(?:watch\?(?:[^#]*&)?v=|embed/|v/))"
+    r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+
+# oEmbed fields kept in get_video_data's result
+_OEMBED_KEYS = (
+    "title",
+    "author_name",
+    "author_url",
+    "type",
+    "height",
+    "width",
+    "version",
+    "provider_name",
+    "provider_url",
+    "thumbnail_url",
+)
+
+# The Data API's videos endpoint accepts at most this many comma-separated IDs
+YOUTUBE_API_BATCH_SIZE = 50
+
+# Matched against the raw page bytes, so the HTML is never decoded
+_LENGTH_SECONDS_RE = re.compile(rb'"lengthSeconds":"(\d+)"')
+_LENGTH_SECONDS_OVERLAP = 32
+
+
+def _extract_video_id(url: str) -> Optional[str]:
+    """Return the 11-character video ID from a YouTube URL, or ``None`` if it is not one."""
+    match = _VIDEO_ID_RE.match(url.strip())
+    return match.group(1) if match else None
+
+
+def _parse_iso_duration(value: str) -> Optional[int]:
+    """Convert an ISO-8601 duration such as ``PT1H2M3S`` to seconds."""
+    match = re.fullmatch(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", value)
+    # A bare "P", or a "T" with no time parts after it, carries no duration at all
+    if not match or not any(match.groups()) or value.endswith("T"):
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+# Transcript fetches currently running, keyed by what they fetch. Concurrent requests for the
+# same transcript await the one task instead of each starting its own fetch
+_inflight_transcripts: dict[tuple, asyncio.Task] = {}
+
+
+def _single_flight(key: tuple, func, *args) -> asyncio.Future:
+    """Run ``func(*args)`` in a worker thread, sharing one run between concurrent callers of ``key``."""
+    task = _inflight_transcripts.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        _inflight_transcripts[key] = task
+        task.add_done_callback(lambda _: _inflight_transcripts.pop(key, None))
+    # A cancelled caller must not cancel the fetch the other callers are waiting on
+    return asyncio.shield(task)
+
+
+def _format_timestamp(snippet: dict) -> str:
+    minutes, seconds = divmod(int(snippet["start"]), 60)
+    return f"[{minutes}:{seconds:02d}] - {snippet['text']}"
+
 
 class YouTubeTools:
     @staticmethod
-    def get_youtube_video_id(url: str) -> Optional[str]:
+    async def close() -> None:
+        """Close the pooled HTTP connections; called on application shutdown."""
+        global _http, _disk_cache
+        if _http is not None:
+            await _http.aclose()
+            _http = None
+        _transcript_session.close()
+        if _disk_cache is not None:
+            _disk_cache.close()
+            _disk_cache = None
+
+    @staticmethod
+    async def get_youtube_video_id(url: str) -> Optional[str]:
         """Function to get the video ID from a YouTube URL."""
-        print(f"[{datetime.now()}] get_youtube_video_id called with URL: {url}")
-
-        parsed_url = urlparse(url)
-        hostname = parsed_url.hostname
-        print(f"[{datetime.now()}] Parsed hostname: {hostname}")
-
-        video_id = None
-        if hostname == "youtu.be":
-            video_id = parsed_url.path[1:]
-            print(f"[{datetime.now()}] Extracted video ID from youtu.be: {video_id}")
-        elif hostname in ("www.youtube.com", "youtube.com"):
-            if parsed_url.path == "/watch":
-                query_params = parse_qs(parsed_url.query)
-                video_id = query_params.get("v", [None])[0]
-                print(f"[{datetime.now()}] Extracted video ID from watch URL: {video_id}")
-            elif parsed_url.path.startswith("/embed/"):
-                video_id = parsed_url.path.split("/")[2]
-                print(f"[{datetime.now()}] Extracted video ID from embed URL: {video_id}")
-            elif parsed_url.path.startswith("/v/"):
-                video_id = parsed_url.path.split("/")[2]
-                print(f"[{datetime.now()}] Extracted video ID from /v/ URL: {video_id}")
+        logger.debug("get_youtube_video_id called with URL: %s", url)
+
+        video_id = _extract_video_id(url)
+        logger.debug("Extracted video ID: %s", video_id)
 
         if not video_id:
-            print(f"[{datetime.now()}] ERROR: Could not extract video ID from URL: {url}")
+            logger.error("Could not extract video ID from URL: %s", url)
             raise HTTPException(status_code=400, detail="Invalid YouTube URL format")
 
+        exists_key = f"exists:{video_id}".encode()
+        if _metadata_cache.get(exists_key):
+            return video_id
+
         try:
             oembed_url = f"https://www.youtube.com/oembed?format=json&url=https://www.youtube.com/watch?v={video_id}"
-            from urllib.request import urlopen
-            from urllib.error import HTTPError
-            with urlopen(oembed_url) as response:
-                pass
-        except HTTPError as e:
-            if e.code in (400, 401, 403, 404):
-                print(f"[{datetime.now()}] ERROR: Video does not exist or is unavailable: {video_id}")
+            (await _get_http().get(oembed_url)).raise_for_status()
+            _metadata_cache.put(exists_key, [video_id], True)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (400, 401, 403, 404):
+                logger.error("Video does not exist or is unavailable: %s", video_id)
                 raise HTTPException(status_code=400, detail="Video does not exist or is unavailable")
-            print(f"[{datetime.now()}] WARNING: Could not verify video existence: {e}")
+            logger.warning("Could not verify video existence: %s", e)
         except Exception as e:
-            print(f"[{datetime.now()}] WARNING: Could not verify video existence: {e}")
+            logger.warning("Could not verify video existence: %s", e)
 
         return video_id
 
     @staticmethod
-    def get_video_data(url: str) -> dict:
+    async def get_video_metadata_bundle(video_id: str) -> Optional[dict]:
+        """Fetch title, channel, thumbnail and duration in one YouTube Data API request.
+
+        Returns ``None`` when no ``YOUTUBE_API_KEY`` is configured or the request fails, in
+        which case callers fall back to oEmbed and the watch page.
+        """
+        return (await YouTubeTools.get_video_data_batch([video_id])).get(video_id)
+
+    @staticmethod
+    async def get_video_data_batch(video_ids: List[str]) -> dict[str, dict]:
+        """Fetch metadata bundles for many videos, up to 50 per YouTube Data API request.
+
+        Returns a dict keyed by video ID. Videos that are cached are not requested again;
+        videos the API does not know, or whose request failed, are missing from the result.
+        """
+        if not settings.YOUTUBE_API_KEY:
+            return {}
+
+        bundles = {}
+        missing = []
+        for video_id in dict.fromkeys(video_ids):
+            cached = _metadata_cache.get(f"bundle:{video_id}".encode())
+            if cached is not None:
+                bundles[video_id] = cached
+            else:
+                missing.append(video_id)
+
+        for start in range(0, len(missing), YOUTUBE_API_BATCH_SIZE):
+            chunk = missing[start : start + YOUTUBE_API_BATCH_SIZE]
+            try:
+                response = await _get_http().get(
+                    "https://www.googleapis.com/youtube/v3/videos",
+                    params={"part": "snippet,contentDetails", "id": ",".join(chunk), "key": settings.YOUTUBE_API_KEY},
+                )
+                response.raise_for_status()
+                items = orjson.loads(response.content).get("items") or []
+            except Exception as e:
+                logger.warning("YouTube Data API lookup failed for %s: %s", chunk, e)
+                continue
+
+            for item in items:
+                snippet = item["snippet"]
+                thumbnails = snippet.get("thumbnails", {})
+                thumbnail = thumbnails.get("high") or thumbnails.get("default") or {}
+                bundle = {
+                    "title": snippet.get("title"),
+                    "author_name": snippet.get("channelTitle"),
+                    "author_url": f"https://www.youtube.com/channel/{snippet['channelId']}" if snippet.get("channelId") else None,
+                    "thumbnail_url": thumbnail.get("url"),
+                    "duration": _parse_iso_duration(item["contentDetails"].get("duration", "")),
+                }
+                bundles[item["id"]] = bundle
+                _metadata_cache.put(f"bundle:{item['id']}".encode(), [item["id"]], bundle)
+
+        return bundles
+
+    @staticmethod
+    async def get_video_data(url: str) -> dict:
         """Function to get video data from a YouTube URL."""
-        print(f"[{datetime.now()}] get_video_data called with URL: {url}")
+        logger.debug("get_video_data called with URL: %s", url)
 
         if not url:
-            print(f"[{datetime.now()}] ERROR: No URL provided to get_video_data")
+            logger.error("No URL provided to get_video_data")
             raise HTTPException(status_code=400, detail="No URL provided")
 
         try:
-            video_id = YouTubeTools.get_youtube_video_id(url)
+            video_id = await YouTubeTools.get_youtube_video_id(url)
             if not video_id:
-                print(f"[{datetime.now()}] ERROR: Invalid YouTube URL: {url}")
+                logger.error("Invalid YouTube URL: %s", url)
                 raise HTTPException(status_code=400, detail="Invalid YouTube URL")
-            print(f"[{datetime.now()}] Video ID extracted: {video_id}")
+            logger.debug("Video ID extracted: %s", video_id)
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video ID: {str(e)}")
+            logger.error("Exception while getting video ID: %s", e)
             raise HTTPException(status_code=400, detail="Error getting video ID from URL")
 
+        meta_key = f"meta:{video_id}".encode()
+        cached = _metadata_cache.get(meta_key)
+        if cached is not None:
+            return cached
+
+        bundle = await YouTubeTools.get_video_metadata_bundle(video_id)
+        if bundle is not None:
+            return {
+                "title": bundle["title"],
+                "author_name": bundle["author_name"],
+                "author_url": bundle["author_url"],
+                "type": "video",
+                "height": None,
+                "width": None,
+                "version": None,
+                "provider_name": "YouTube",
+                "provider_url": "https://www.youtube.com/",
+                "thumbnail_url": bundle["thumbnail_url"],
+            }
+
         try:
             params = {"format": "json", "url": f"https://www.youtube.com/watch?v={video_id}"}
             oembed_url = "https://www.youtube.com/oembed"
             query_string = urlencode(params)
             full_url = oembed_url + "?" + query_string
-            print(f"[{datetime.now()}] Making request to oEmbed API: {full_url}")
-
-            with urlopen(full_url) as response:
-                response_text = response.read()
-                print(f"[{datetime.now()}] Received response from oEmbed API")
-                video_data = json.loads(response_text.decode())
-                print(f"[{datetime.now()}] Successfully parsed video data JSON")
-
-                clean_data = {
-                    "title": video_data.get("title"),
-                    "author_name": video_data.get("author_name"),
-                    "author_url": video_data.get("author_url"),
-                    "type": video_data.get("type"),
-                    "height": video_data.get("height"),
-                    "width": video_data.get("width"),
-                    "version": video_data.get("version"),
-                    "provider_name": video_data.get("provider_name"),
-                    "provider_url": video_data.get("provider_url"),
-                    "thumbnail_url": video_data.get("thumbnail_url"),
-                }
-                print(f"[{datetime.now()}] Video data retrieved: Title='{clean_data.get('title')}', Author='{clean_data.get('author_name')}'")
-                return clean_data
+            logger.debug("Making request to oEmbed API: %s", full_url)
+
+            response = await _get_http().get(full_url)
+            response.raise_for_status()
+            logger.debug("Received response from oEmbed API")
+            video_data = orjson.loads(response.content)
+            logger.debug("Successfully parsed video data JSON")
+
+            clean_data = {key: video_data.get(key) for key in _OEMBED_KEYS}
+            logger.debug("Video data retrieved: Title='%s', Author='%s'", clean_data.get('title'), clean_data.get('author_name'))
+            _metadata_cache.put(meta_key, [video_id], clean_data)
+            return clean_data
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video data: {str(e)}")
+            logger.error("Exception while getting video data: %s", e)
             raise HTTPException(status_code=500, detail=f"Error getting video data: {str(e)}")
 
     @staticmethod
-    def get_video_duration(url: str) -> Optional[int]:
+    async def get_video_duration(url: str) -> Optional[int]:
         """Function to get the video duration in seconds from a YouTube URL."""
-        print(f"[{datetime.now()}] get_video_duration called with URL: {url}")
+        logger.debug("get_video_duration called with URL: %s", url)
         
         try:
-            video_id = YouTubeTools.get_youtube_video_id(url)
+            video_id = await YouTubeTools.get_youtube_video_id(url)
             if not video_id:
-                print(f"[{datetime.now()}] WARNING: Could not extract video ID for duration")
+                logger.warning("Could not extract video ID for duration")
                 return None
                 
+            duration_key = f"dur:{video_id}".encode()
+            cached = _metadata_cache.get(duration_key)
+            if cached is not None:
+                return cached
+
+            bundle = await YouTubeTools.get_video_metadata_bundle(video_id)
+            if bundle is not None and bundle["duration"] is not None:
+                return bundle["duration"]
+
             # Construct standard watch URL for reliable duration scraping
             fetch_url = f"https://www.youtube.com/watch?v={video_id}"
-            print(f"[{datetime.now()}] Fetching duration from: {fetch_url}")
-
-            # Using urllib to fetch the page content
-            with urlopen(fetch_url) as response:
-                html = response.read().decode('utf-8')
-                
-                # Search for lengthSeconds in the HTML content
-                match = re.search(r'\"lengthSeconds\":\"(\d+)\"', html)
-                if match:
-                    duration = int(match.group(1))
-                    print(f"[{datetime.now()}] Video duration found: {duration} seconds")
-                    return duration
+            logger.debug("Fetching duration from: %s", fetch_url)
+
+            # lengthSeconds sits in the player response near the top of the page, so the
+            # download stops as soon as it has been seen instead of reading the whole page
+            match = None
+            async with _get_http().stream("GET", fetch_url) as response:
+                response.raise_for_status()
+                html = bytearray()
+                async for chunk in response.aiter_bytes():
+                    # Only rescan the new bytes, plus enough of the old ones to catch a split match
+                    start = max(0, len(html) - _LENGTH_SECONDS_OVERLAP)
+                    html += chunk
+                    match = _LENGTH_SECONDS_RE.search(html, start)
+                    if match:
+                        break
+
+            if match:
+                duration = int(match.group(1))
+                logger.debug("Video duration found: %s seconds", duration)
+                _metadata_cache.put(duration_key, [video_id], duration)
+                return duration
             
-            print(f"[{datetime.now()}] WARNING: Could not find lengthSeconds in HTML")
+            logger.warning("Could not find lengthSeconds in HTML")
             return None
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video duration: {str(e)}")
+            logger.error("Exception while getting video duration: %s", e)
             return None
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def _create_youtube_api():
-        """Create a YouTubeTranscriptApi instance with proxy config."""
-        
-        return YouTubeTranscriptApi()
+        """Return the shared YouTubeTranscriptApi instance, importing the library on first use."""
+        try:
+            from youtube_transcript_api import YouTubeTranscriptApi
+        except ImportError:
+            logger.error("Failed to import youtube_transcript_api")
+            raise ImportError(
+                "`youtube_transcript_api` not installed. Please install using `pip install youtube_transcript_api`"
+            )
+        return YouTubeTranscriptApi(http_client=_transcript_session)
 
     @staticmethod
     def _get_transcript_with_fallback(video_id: str, languages: Optional[List[str]] = None):
-        """Get transcript with language fallback logic."""
+        """Get transcript snippets as ``{"text", "start", "duration"}`` dicts, with language fallback.
+
+        Results are cached per video and language preference.
+        """
+        # Language order is a preference order, so it is part of the key as given
+        key = f"tx:{video_id}:{','.join(languages or [])}".encode()
+        cached = _transcript_cache.get(key)
+        if cached is None:
+            fetched_transcript, available_languages = YouTubeTools._fetch_transcript_with_fallback(video_id, languages)
+            cached = (fetched_transcript.to_raw_data(), available_languages)
+            _transcript_cache.put(key, [video_id], cached)
+        return cached
+
+    @staticmethod
+    def _fetch_transcript_with_fallback(video_id: str, languages: Optional[List[str]] = None):
         ytt_api = YouTubeTools._create_youtube_api()
 
-        
+        # Fetch from this list rather than through ytt_api.fetch, which would list the video's
+        # transcripts a second time before fetching
         transcript_list = ytt_api.list(video_id)
-        available_languages = [t.language_code for t in transcript_list]
+        # One entry per language, keeping the first listed (manually created) transcript for each,
+        # so the preference checks below are dict lookups and the match is fetched directly
+        transcripts = {}
+        for transcript in transcript_list:
+            transcripts.setdefault(transcript.language_code, transcript)
+        available_languages = list(transcripts)
 
-        
-        if languages:
-            
-            for lang in languages:
-                if lang in available_languages:
-                    fetched_transcript = ytt_api.fetch(video_id, languages=[lang])
-                    return fetched_transcript, available_languages
-            
-            fetched_transcript = ytt_api.fetch(video_id, languages=[available_languages[0]])
-            return fetched_transcript, available_languages
-        else:
-            
-            if 'en' in available_languages:
-                fetched_transcript = ytt_api.fetch(video_id, languages=['en'])
-                return fetched_transcript, available_languages
-            else:
-                fetched_transcript = ytt_api.fetch(video_id, languages=[available_languages[0]])
-                return fetched_transcript, available_languages
+        for lang in languages or ["en"]:
+            if lang in transcripts:
+                return transcripts[lang].fetch(), available_languages
+
+        return transcripts[available_languages[0]].fetch(), available_languages
+
+    @staticmethod
+    def _get_caption_text(video_id: str, languages: Optional[List[str]] = None):
+        """Fetch a transcript and join its text in the calling thread, off the event loop."""
+        fetched_transcript, available_languages = YouTubeTools._get_transcript_with_fallback(video_id, languages)
+        caption_text = " ".join(snippet["text"] for snippet in fetched_transcript) if fetched_transcript else None
+        return caption_text, available_languages
+
+    @staticmethod
+    def _get_timestamped_text(video_id: str):
+        """Fetch the English-preferred transcript and format it as timestamped lines, off the event loop."""
+        fetched_transcript, available_languages = YouTubeTools._get_transcript_with_fallback(video_id, ["en"])
+        return ", ".join(_format_timestamp(snippet) for snippet in fetched_transcript), available_languages
 
     @staticmethod
     async def get_video_captions(url: str, languages: Optional[List[str]] = None) -> str:
         """Get captions from a YouTube video using the new API."""
-        print(f"[{datetime.now()}] get_video_captions called with URL: {url}, languages: {languages}")
+        logger.debug("get_video_captions called with URL: %s, languages: %s", url, languages)
 
         if not url:
-            print(f"[{datetime.now()}] ERROR: No URL provided to get_video_captions")
+            logger.error("No URL provided to get_video_captions")
             raise HTTPException(status_code=400, detail="No URL provided")
 
         try:
-            video_id = YouTubeTools.get_youtube_video_id(url)
+            video_id = await YouTubeTools.get_youtube_video_id(url)
             if not video_id:
-                print(f"[{datetime.now()}] ERROR: Invalid YouTube URL: {url}")
+                logger.error("Invalid YouTube URL: %s", url)
                 raise HTTPException(status_code=400, detail="Invalid YouTube URL")
-            print(f"[{datetime.now()}] Video ID extracted: {video_id}")
+            logger.debug("Video ID extracted: %s", video_id)
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video ID: {str(e)}")
+            logger.error("Exception while getting video ID: %s", e)
             raise HTTPException(status_code=400, detail="Error getting video ID from URL")
 
         try:
-            print(f"[{datetime.now()}] Fetching transcript in background thread...")
+            logger.debug("Fetching transcript in background thread...")
 
             
-            fetched_transcript, available_languages = await asyncio.to_thread(
-                YouTubeTools._get_transcript_with_fallback, video_id, languages
+            caption_text, available_languages = await _single_flight(
+                ("captions", video_id, tuple(languages or ())), YouTubeTools._get_caption_text, video_id, languages
             )
 
-            print(f"[{datetime.now()}] Available transcript languages: {available_languages}")
-
-            if fetched_transcript:
-                print(f"[{datetime.now()}] Transcript fetched successfully")
-                print(f"[{datetime.now()}] Transcript info - Language: {fetched_transcript.language}, Code: {fetched_transcript.language_code}, Generated: {fetched_transcript.is_generated}")
-                print(f"[{datetime.now()}] Number of snippets: {len(fetched_transcript)}")
+            logger.debug("Available transcript languages: %s", available_languages)
 
-                
-                caption_text = " ".join(snippet.text for snippet in fetched_transcript)
-                print(f"[{datetime.now()}] Combined caption text length: {len(caption_text)} characters")
+            if caption_text:
+                logger.debug("Combined caption text length: %s characters", len(caption_text))
                 return caption_text
 
-            print(f"[{datetime.now()}] WARNING: No captions found for video")
+            logger.warning("No captions found for video")
             return "No captions found for video"
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting captions: {str(e)}")
+            logger.error("Exception while getting captions: %s", e)
             raise HTTPException(status_code=500, detail=f"Error getting captions for video: {str(e)}")
 
     @staticmethod
     async def get_video_timestamps(url: str, languages: Optional[List[str]] = None) -> str:
         """Generate timestamps for a YouTube video based on captions using the new API."""
-        print(f"[{datetime.now()}] get_video_timestamps called with URL: {url}, languages: {languages}")
+        logger.debug("get_video_timestamps called with URL: %s, languages: %s", url, languages)
 
         if not url:
-            print(f"[{datetime.now()}] ERROR: No URL provided to get_video_timestamps")
+            logger.error("No URL provided to get_video_timestamps")
             raise HTTPException(status_code=400, detail="No URL provided")
 
         try:
-            video_id = YouTubeTools.get_youtube_video_id(url)
+            video_id = await YouTubeTools.get_youtube_video_id(url)
             if not video_id:
-                print(f"[{datetime.now()}] ERROR: Invalid YouTube URL: {url}")
+                logger.error("Invalid YouTube URL: %s", url)
                 raise HTTPException(status_code=400, detail="Invalid YouTube URL")
-            print(f"[{datetime.now()}] Video ID extracted: {video_id}")
+            logger.debug("Video ID extracted: %s", video_id)
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video ID: {str(e)}")
+            logger.error("Exception while getting video ID: %s", e)
             raise HTTPException(status_code=400, detail="Error getting video ID from URL")
 
         try:
-            print(f"[{datetime.now()}] Fetching transcript in background thread...")
+            logger.debug("Fetching transcript in background thread...")
 
-            fetched_transcript, available_languages = await asyncio.to_thread(
-                YouTubeTools._get_transcript_with_fallback, video_id, ["en"]
+            timestamps, available_languages = await _single_flight(
+                ("timestamps", video_id), YouTubeTools._get_timestamped_text, video_id
             )
 
             if not any(lang.startswith("en") for lang in available_languages):
-                print(f"[{datetime.now()}] ERROR: English transcript not available. Found: {available_languages}")
+                logger.error("English transcript not available. Found: %s", available_languages)
                 raise HTTPException(status_code=422, detail="Only English transcripts are supported")
 
-            print(f"[{datetime.now()}] Available transcript languages: {available_languages}")
-            print(f"[{datetime.now()}] Transcript fetched successfully")
-            print(f"[{datetime.now()}] Processing {len(fetched_transcript)} snippets into timestamps")
-
-            timestamps = []
-            for i, snippet in enumerate(fetched_transcript):
-                start = int(snippet.start)
-                minutes, seconds = divmod(start, 60)
-                timestamp = f"[{minutes}:{seconds:02d}] - {snippet.text}"
-                timestamps.append(timestamp)
-
-                if i < 5:  
-                    print(f"[{datetime.now()}] Sample timestamp [{i}]: {timestamp}")
-
-            print(f"[{datetime.now()}] Generated {len(timestamps)} timestamps")
-            timestamps = ", ".join(timestamps)
+            logger.debug("Available transcript languages: %s", available_languages)
             return timestamps
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while generating timestamps: {str(e)}")
+            logger.error("Exception while generating timestamps: %s", e)
             raise HTTPException(status_code=500, detail=f"Error generating timestamps: {str(e)}")
 
     @staticmethod
     async def get_video_transcript_languages(url: str) -> List[dict]:
         """List available transcript languages for a video."""
-        print(f"[{datetime.now()}] get_video_transcript_languages called with URL: {url}")
+        logger.debug("get_video_transcript_languages called with URL: %s", url)
 
         if not url:
-            print(f"[{datetime.now()}] ERROR: No URL provided")
+            logger.error("No URL provided")
             raise HTTPException(status_code=400, detail="No URL provided")
 
         try:
-            video_id = YouTubeTools.get_youtube_video_id(url)
+            video_id = await YouTubeTools.get_youtube_video_id(url)
             if not video_id:
-                print(f"[{datetime.now()}] ERROR: Invalid YouTube URL: {url}")
+                logger.error("Invalid YouTube URL: %s", url)
                 raise HTTPException(status_code=400, detail="Invalid YouTube URL")
-            print(f"[{datetime.now()}] Video ID extracted: {video_id}")
+            logger.debug("Video ID extracted: %s", video_id)
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while getting video ID: {str(e)}")
+            logger.error("Exception while getting video ID: %s", e)
             raise HTTPException(status_code=400, detail="Error getting video ID from URL")
 
         try:
-            print(f"[{datetime.now()}] Listing available transcripts in background thread...")
+            logger.debug("Listing available transcripts in background thread...")
 
             def list_transcripts(video_id):
-                ytt_api = YouTubeTools._create_youtube_api()
-                return ytt_api.list(video_id)
+                # The cache may read from disk, so it is consulted here rather than on the event loop
+                langs_key = f"langs:{video_id}".encode()
+                cached = _transcript_cache.get(langs_key)
+                if cached is not None:
+                    return cached
 
-            
-            transcript_list = await asyncio.to_thread(list_transcripts, video_id)
-
-            languages_info = []
-            for transcript in transcript_list:
-                lang_info = {
-                    "language": transcript.language,
-                    "language_code": transcript.language_code,
-                    "is_generated": transcript.is_generated,
-                    "is_translatable": transcript.is_translatable
-                }
-                languages_info.append(lang_info)
-                print(f"[{datetime.now()}] Found transcript: {transcript.language} ({transcript.language_code}) - Generated: {transcript.is_generated}")
-
-            print(f"[{datetime.now()}] Found {len(languages_info)} available transcript languages")
+                ytt_api = YouTubeTools._create_youtube_api()
+                languages_info = []
+                for transcript in ytt_api.list(video_id):
+                    lang_info = {
+                        "language": transcript.language,
+                        "language_code": transcript.language_code,
+                        "is_generated": transcript.is_generated,
+                        "is_translatable": transcript.is_translatable
+                    }
+                    languages_info.append(lang_info)
+                    logger.debug("Found transcript: %s (%s) - Generated: %s", transcript.language, transcript.language_code, transcript.is_generated)
+
+                _transcript_cache.put(langs_key, [video_id], languages_info)
+                return languages_info
+
+            languages_info = await asyncio.to_thread(list_transcripts, video_id)
+            logger.debug("Found %s available transcript languages", len(languages_info))
             return languages_info
 
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR: Exception while listing transcript languages: {str(e)}")
+            logger.error("Exception while listing transcript languages: %s", e)
             raise HTTPException(status_code=500, detail=f"Error listing transcript languages: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.services import youtube_service
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+def _patch_pipeline(monkeypatch, fail_first: bool):
+    """Replace the YouTube and database calls so only the locking in ingest_youtube_video runs."""
+    state = {"stored": {}, "runs": [], "active": 0, "failed_once": asyncio.Event()}
+
+    async def get_video_id(url):
+        return VIDEO_ID
+
+    async def get_video_by_id(session, video_id):
+        await asyncio.sleep(0)
+        return state["stored"].get(video_id)
+
+    async def open_thread(session, video):
+        return video, "existing"
+
+    async def ingest_new_video(video_id, *args):
+        state["active"] += 1
+        state["runs"].append(state["active"])
+        try:
+            if fail_first and not state["failed_once"].is_set():
+                state["failed_once"].set()
+                raise RuntimeError("boom")
+            await asyncio.sleep(0.01)
+            state["stored"][video_id] = "video"
+            return "video", "new"
+        finally:
+            state["active"] -= 1
+
+    monkeypatch.setattr(youtube_service.YouTubeTools, "get_youtube_video_id", staticmethod(get_video_id))
+    monkeypatch.setattr(youtube_service, "get_video_by_id", get_video_by_id)
+    monkeypatch.setattr(youtube_service, "_open_thread", open_thread)
+    monkeypatch.setattr(youtube_service, "_ingest_new_video", ingest_new_video)
+    return state
+
+def _ingest():
+    return youtube_service.ingest_youtube_video("url", None, None, None, None)
+
+def test_concurrent_ingests_run_pipeline_once(monkeypatch):
+    state = _patch_pipeline(monkeypatch, fail_first=False)
+
+    async def main():
+        return await asyncio.gather(*(_ingest() for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert state["runs"] == [1]
+    assert sorted(thread for _, thread in results) == ["existing", "existing", "existing", "new"]
+    assert youtube_service._video_locks == {}
+    assert youtube_service._video_lock_users == {}
+
+def test_lock_is_kept_while_a_waiter_reacquires_it(monkeypatch):
+    # The first ingest fails, handing the lock to a waiter; a request arriving during that
+    # handoff must queue on the same lock instead of ingesting alongside the waiter
+    state = _patch_pipeline(monkeypatch, fail_first=True)
+
+    async def late():
+        await state["failed_once"].wait()
+        return await _ingest()
+
+    async def main():
+        return await asyncio.gather(_ingest(), _ingest(), _ingest(), late(), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert isinstance(results[0], RuntimeError)
+    assert state["runs"] == [1, 1]
+    assert sorted(thread for _, thread in results[1:]) == ["existing", "existing", "new"]
+    assert youtube_service._video_locks == {}
+    assert youtube_service._video_lock_users == {}
@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.query_cache import QueryCache, SemanticQueryCache
+
+def test_key_ignores_video_order():
+    assert QueryCache.make_key("q", ["a", "b"], 3) == QueryCache.make_key("q", ["b", "a"], 3)
+    assert QueryCache.make_key("q", ["a"], 3) != QueryCache.make_key("q", ["a"], 5)
+
+def test_lru_eviction():
+    cache = QueryCache(max_size=2)
+    cache.put(b"1", ["a"], "one")
+    cache.put(b"2", ["a"], "two")
+    cache.get(b"1")
+    cache.put(b"3", ["a"], "three")
+
+    assert cache.get(b"1") == "one"
+    assert cache.get(b"2") is None
+    assert cache.get(b"3") == "three"
+
+def test_ttl_expiry():
+    cache = QueryCache(ttl_seconds=-1)
+    cache.put(b"1", ["a"], "one")
+    assert cache.get(b"1") is None
+
+def test_invalidate_by_video():
+    cache = QueryCache()
+    cache.put(b"1", ["a", "b"], "ab")
+    cache.put(b"2", ["c"], "c")
+    cache.invalidate("b")
+
+    assert cache.get(b"1") is None
+    assert cache.get(b"2") == "c"
+
+def test_semantic_hit_above_threshold():
+    cache = SemanticQueryCache(threshold=0.97)
+    cache.put(["a"], [1.0, 0.0, 0.0], "first")
+
+    assert cache.get(["a"], [0.99, 0.01, 0.0]) == "first"
+    assert cache.get(["a"], [0.0, 1.0, 0.0]) is None
+    assert cache.get(["b"], [1.0, 0.0, 0.0]) is None
+
+def test_semantic_ring_buffer_overwrites_oldest():
+    cache = SemanticQueryCache(max_size=2)
+    cache.put(["a"], [1.0, 0.0], "x")
+    cache.put(["a"], [0.0, 1.0], "y")
+    cache.put(["a"], [-1.0, 0.0], "z")
+
+    assert cache.get(["a"], [1.0, 0.0]) is None
+    assert cache.get(["a"], [-1.0, 0.0]) == "z"
@@ -0,0 +1,20 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.rank import mmr_select
+
+def test_picks_most_relevant_first():
+    picked = mmr_select([1.0, 0.0], [[0.0, 1.0], [1.0, 0.0], [0.7, 0.7]], k=1)
+    assert picked == [1]
+
+def test_skips_near_duplicates():
+    candidates = [[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]]
+    assert mmr_select([1.0, 0.0], candidates, k=2, lambda_mult=0.3) == [0, 2]
+    assert mmr_select([1.0, 0.0], candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+def test_k_larger_than_candidates():
+    assert sorted(mmr_select([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], k=5)) == [0, 1]
+    assert mmr_select([1.0, 0.0], [], k=3) == []
@@ -0,0 +1,64 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.models import Thread, YTVideo
+from src.crud.thread import get_threads_page
+
+TIED = datetime(2026, 1, 2, tzinfo=timezone.utc)
+OLDER = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def _run_with_threads(check):
+    """Seed five threads sharing one created_at and two older ones, then run ``check``."""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(YTVideo(video_id="v", url="u", title="t", transcript="x", summary="s"))
+            session.add_all([Thread(video_id="v", title=f"tied{i}", created_at=TIED) for i in range(5)])
+            session.add_all([
+                Thread(video_id="v", title=f"older{i}", created_at=OLDER - timedelta(minutes=i)) for i in range(2)
+            ])
+            await session.commit()
+            result = await check(session)
+        await engine.dispose()
+        return result
+    return asyncio.run(main())
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def test_tied_timestamps_appear_once_across_pages():
+    async def walk(session):
+        titles, before, before_id = [], None, None
+        while True:
+            page = await get_threads_page(session, 2, before, before_id)
+            titles += [t.title for t in page]
+            if len(page) < 2:
+                return titles
+            before, before_id = page[-1].created_at, page[-1].thread_id
+
+    titles = _run_with_threads(walk)
+
+    assert len(titles) == 7
+    assert sorted(titles) == sorted([f"tied{i}" for i in range(5)] + ["older0", "older1"])
+    assert titles[-2:] == ["older0", "older1"]
+
+def test_before_without_id_returns_strictly_older_threads():
+    async def page(session):
+        return await get_threads_page(session, 10, TIED)
+
+    threads = _run_with_threads(page)
+
+    assert [t.title for t in threads] == ["older0", "older1"]
+    assert all(_as_utc(t.created_at) < TIED for t in threads)
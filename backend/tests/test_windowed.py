@@ -0,0 +1,52 @@
+import random
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.services.youtube_service import _windowed
+
+def _positions(text, windows):
+    """Locate each window in ``text``; each one starts after the previous window's start."""
+    positions, start = [], 0
+    for window in windows:
+        start = text.find(window, start + 1 if positions else 0)
+        assert start != -1
+        positions.append(start)
+    return positions
+
+def _check_windows(text, size, overlap):
+    windows = _windowed(text, size, overlap)
+    positions = _positions(text, windows)
+
+    assert positions[0] == 0
+    assert all(len(window) <= size for window in windows)
+
+    rebuilt = windows[0]
+    for prev_pos, prev, pos, window in zip(positions, windows, positions[1:], windows[1:]):
+        shared = prev_pos + len(prev) - pos
+        # No gap between windows, and no more than ``overlap`` characters repeated
+        assert 0 <= shared <= overlap
+        rebuilt += window[shared:]
+    assert rebuilt == text
+    return windows
+
+def test_short_text_is_one_window():
+    assert _windowed("a short transcript", 500, 100) == ["a short transcript"]
+    assert _windowed("", 500, 100) == []
+
+def test_text_without_spaces_is_cut_at_size():
+    text = "".join(chr(ord("a") + i % 26) + str(i) for i in range(400))
+    windows = _check_windows(text, 100, 20)
+    assert len(windows) > 1
+    assert all(len(window) == 100 for window in windows[:-1])
+
+def test_windows_respect_size_overlap_and_lose_no_text():
+    rng = random.Random(7)
+    words = [f"w{i}" + "x" * rng.randint(0, 12) for i in range(2000)]
+    text = " ".join(words)
+    for size, overlap in [(500, 100), (120, 30), (50, 0)]:
+        windows = _check_windows(text, size, overlap)
+        assert len(windows) > 1
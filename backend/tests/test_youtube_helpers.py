@@ -0,0 +1,133 @@
+import asyncio
+import sys
+import os
+import threading
+
+import pytest
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import src.services.youtube_tools as youtube_tools
+from src.core.config import settings
+from src.services.youtube_tools import (
+    YouTubeTools,
+    _extract_video_id,
+    _inflight_transcripts,
+    _parse_iso_duration,
+    _single_flight,
+)
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        ("PT1H2M3S", 3723),
+        ("PT45S", 45),
+        ("P1DT2H", 93600),
+        ("PT0S", 0),
+        ("P0D", 0),
+    ],
+)
+def test_parse_iso_duration(value, seconds):
+    assert _parse_iso_duration(value) == seconds
+
+@pytest.mark.parametrize("value", ["", "3:33", "PT1H2X", "1H2M", "P", "PT", "P1DT"])
+def test_parse_iso_duration_rejects_malformed(value):
+    assert _parse_iso_duration(value) is None
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+        "https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+        "http://youtu.be/dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?si=abc",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+        "https://www.youtube.com/v/dQw4w9WgXcQ",
+        "www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://YouTube.com/watch?v=dQw4w9WgXcQ",
+        "HTTPS://WWW.YOUTUBE.COM/watch?v=dQw4w9WgXcQ",
+        "https://YOUTU.BE/dQw4w9WgXcQ",
+        "  https://www.youtube.com/watch?v=dQw4w9WgXcQ\n",
+    ],
+)
+def test_extract_video_id_accepts_youtube_urls(url):
+    assert _extract_video_id(url) == "dQw4w9WgXcQ"
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+        "https://evil.com/youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://www.youtube.com/watch?v=dQw4w9WgXc",
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQQ",
+        "https://youtu.be/dQw4w9WgXcQQ",
+        "https://www.youtube.com/watch?vv=dQw4w9WgXcQ",
+        "https://www.youtube.com/channel/dQw4w9WgXcQ",
+        "",
+    ],
+)
+def test_extract_video_id_rejects_other_urls(url):
+    assert _extract_video_id(url) is None
+
+def test_close_does_not_open_unused_disk_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(settings, "YOUTUBE_DISK_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "YOUTUBE_DISK_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(youtube_tools, "_disk_cache", None)
+
+    asyncio.run(YouTubeTools.close())
+    assert not cache_dir.exists()
+
+    assert youtube_tools._get_disk_cache() is not None
+    asyncio.run(YouTubeTools.close())
+    assert youtube_tools._disk_cache is None
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    release = threading.Event()
+    calls = []
+
+    def fetch(video_id):
+        calls.append(video_id)
+        release.wait(timeout=5)
+        return f"transcript of {video_id}"
+
+    async def main():
+        key = ("captions", "dQw4w9WgXcQ", ())
+        waiters = [_single_flight(key, fetch, "dQw4w9WgXcQ") for _ in range(4)]
+        assert key in _inflight_transcripts
+        release.set()
+        results = await asyncio.gather(*waiters)
+        await asyncio.sleep(0)
+        return key, results
+
+    key, results = asyncio.run(main())
+    assert results == ["transcript of dQw4w9WgXcQ"] * 4
+    assert calls == ["dQw4w9WgXcQ"]
+    assert key not in _inflight_transcripts
+
+def test_single_flight_cancelled_caller_does_not_cancel_shared_fetch():
+    release = threading.Event()
+
+    def fetch():
+        release.wait(timeout=5)
+        return "transcript"
+
+    async def main():
+        key = ("timestamps", "dQw4w9WgXcQ")
+        cancelled = _single_flight(key, fetch)
+        waiting = _single_flight(key, fetch)
+        shared = _inflight_transcripts[key]
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiting == "transcript"
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert not shared.cancelled()
+        assert shared.result() == "transcript"
+
+    asyncio.run(main())
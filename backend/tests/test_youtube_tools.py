@@ -1,11 +1,17 @@
+import asyncio
 import sys
 import os
 
+import pytest
+
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.services.youtube_tools import YouTubeTools
 
+# Talks to youtube.com; skip with `pytest -m "not integration"`
+pytestmark = pytest.mark.integration
+
 def test_get_video_duration():
     urls = [
         "https://www.youtube.com/watch?v=dQw4w9WgXcQ",  # Rick Astley - Never Gonna Give You Up (3:33 = 213s)
@@ -13,9 +19,12 @@ def test_get_video_duration():
         "https://www.youtube.com/embed/dQw4w9WgXcQ",
     ]
     
-    for url in urls:
+    # One event loop for every lookup, since the shared client pools connections per loop
+    async def get_durations():
+        return [await YouTubeTools.get_video_duration(url) for url in urls]
+
+    for url, duration in zip(urls, asyncio.run(get_durations())):
         print(f"\nTesting URL: {url}")
-        duration = YouTubeTools.get_video_duration(url)
         if duration is not None:
             print(f"SUCCESS: Retrieved duration: {duration} seconds")
             # Rick Astley's never gonna give you up is 212 or 213 seconds usually
@@ -29,9 +29,10 @@ export async function POST(request: NextRequest) {
   }
 }
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
-    const response = await fetch(`${config.apiUrl}/api/v1/threads`);
+    // Forward the paging parameters (limit, before, before_id) unchanged
+    const response = await fetch(`${config.apiUrl}/api/v1/threads${request.nextUrl.search}`);
     const data = await response.json();
 
     if (!response.ok) {
@@ -3,6 +3,7 @@ import { ApiError } from "@/lib/errors";
 import type {
   CreateThreadResponse,
   ThreadListItem,
+  ThreadListResponse,
   ThreadMessagesResponse,
   DeleteThreadResponse,
 } from "@/lib/types";
@@ -36,15 +37,25 @@ export const apiClient = {
     },
 
     /**
-     * GET /api/chat — list all threads.
+     * GET /api/chat — list every thread, newest first.
+     * The backend returns one page at a time, so the cursors are followed until the last page.
      */
     list: async (): Promise<ThreadListItem[]> => {
+      const threads: ThreadListItem[] = [];
       try {
-        const res = await fetch(`${BASE}`);
-        return handleResponse<ThreadListItem[]>(res);
+        const params = new URLSearchParams({ limit: "200" });
+        for (;;) {
+          const res = await fetch(`${BASE}?${params}`);
+          const page = await handleResponse<ThreadListResponse>(res);
+          threads.push(...page.items);
+          if (!page.next_cursor) break;
+          params.set("before", page.next_cursor);
+          if (page.next_cursor_id) params.set("before_id", page.next_cursor_id);
+        }
       } catch {
-        return [];
+        // Keep whatever pages loaded before the failure
       }
+      return threads;
     },
 
     /**
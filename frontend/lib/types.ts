@@ -8,6 +8,13 @@ export interface ThreadListItem {
   created_at: string; // ISO 8601
 }
 
+/** One page of threads as returned by GET /api/v1/threads, newest first */
+export interface ThreadListResponse {
+  items: ThreadListItem[];
+  next_cursor: string | null; // pass as ?before= to fetch the next page
+  next_cursor_id: string | null; // pass as ?before_id= alongside before
+}
+
 /** Full thread info (used in UI state after creation) */
 export interface Thread {
   thread_id: string;